@@ -0,0 +1,235 @@
+# NumPy batch simulator: advances N independent snake games at once.
+#
+# Follows exactly the rules of snake_engine (and so of the original
+# game_loop): wrap-around movement, growing on food, self / body / head-on
+# collisions checked in the same order, full-board detection, and food
+# respawned from the same swap-remove free-cell lists and SplitMix64 stream.
+# For equal seeds and actions every game in the batch matches the scalar
+# engine tick for tick.
+#
+# Cells are packed as in snake_engine (row * cols + col). Directions are small
+# integers (see DIRECTIONS); an action of -1 keeps the current direction.
+import random
+
+import numpy as np
+
+import snake_engine
+
+DIRECTIONS = (snake_engine.UP, snake_engine.DOWN, snake_engine.LEFT, snake_engine.RIGHT)
+DIRECTION_CODES = {name: code for code, name in enumerate(DIRECTIONS)}
+# Opposite direction is code ^ 1 (UP <-> DOWN, LEFT <-> RIGHT)
+_DX = np.array([0, 0, -1, 1], dtype=np.int64)
+_DY = np.array([-1, 1, 0, 0], dtype=np.int64)
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_MIX1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX2 = np.uint64(0x94D049BB133111EB)
+
+
+def random_u64(seeds, counters):
+    # Vectorized snake_engine.random_u64
+    z = seeds + (counters + np.uint64(1)) * _GOLDEN
+    z = (z ^ (z >> np.uint64(30))) * _MIX1
+    z = (z ^ (z >> np.uint64(27))) * _MIX2
+    return z ^ (z >> np.uint64(31))
+
+
+class BatchGame:
+    def __init__(self, num_games, cols, rows, single_player=True, seeds=None):
+        self.num_games = num_games
+        self.cols = cols
+        self.rows = rows
+        self.num_cells = cols * rows
+        self.num_snakes = 1 if single_player else 2
+
+        n, s, c = num_games, self.num_snakes, self.num_cells
+        # Ring buffer of body cells per snake; the head is at body_start
+        self.bodies = np.zeros((n, s, c), dtype=np.int32)
+        self.body_start = np.zeros((n, s), dtype=np.int64)
+        self.lengths = np.zeros((n, s), dtype=np.int64)
+        self.directions = np.zeros((n, s), dtype=np.int8)
+        # Per-snake and combined occupancy counts, for O(1) collision checks
+        self.occupancy = np.zeros((n, s, c), dtype=np.uint8)
+        self.occupied = np.zeros((n, c), dtype=np.uint8)
+        # Free cells in swap-remove order, with each cell's position (-1 if occupied)
+        self.free_cells = np.zeros((n, c), dtype=np.int32)
+        self.free_index = np.full((n, c), -1, dtype=np.int32)
+        self.free_count = np.zeros(n, dtype=np.int64)
+
+        self.food = np.full(n, -1, dtype=np.int64)
+        self.seeds = np.zeros(n, dtype=np.uint64)
+        self.spawn_count = np.zeros(n, dtype=np.uint64)
+        self.ticks = np.zeros(n, dtype=np.int64)
+        self.game_over = np.zeros(n, dtype=bool)
+        self.winner = np.full(n, -1, dtype=np.int8)  # -1: no winner (draw / single player)
+        self.ate = np.zeros((n, s), dtype=bool)
+        self.food_spawned = np.zeros(n, dtype=bool)
+        self.board_full = np.zeros(n, dtype=bool)
+
+        self._games = np.arange(n)
+        self.reset(self._games, seeds)
+
+    def reset(self, games, seeds=None):
+        # (Re)start the given games from the standard opening position
+        games = np.asarray(games, dtype=np.int64)
+        if seeds is None:
+            seeds = [random.getrandbits(64) for _ in range(len(games))]
+        self.seeds[games] = np.asarray(seeds, dtype=np.uint64)
+
+        self.occupancy[games] = 0
+        snakes = snake_engine.initial_snakes(self.cols, self.rows, self.num_snakes == 1)
+        for idx, snake in enumerate(snakes):
+            cells = list(snake.body)
+            self.bodies[games, idx, :len(cells)] = cells
+            self.body_start[games, idx] = 0
+            self.lengths[games, idx] = len(cells)
+            self.directions[games, idx] = DIRECTION_CODES[snake.direction]
+            self.occupancy[games[:, None], idx, np.array(cells)[None, :]] += 1
+        self.occupied[games] = self.occupancy[games].sum(axis=1)
+
+        # Every game starts from the same layout, so they share the free list
+        free = np.flatnonzero(self.occupied[games[0]] == 0) if len(games) else np.zeros(0, dtype=np.int64)
+        self.free_cells[games, :len(free)] = free
+        self.free_index[games] = -1
+        self.free_index[games[:, None], free[None, :]] = np.arange(len(free))
+        self.free_count[games] = len(free)
+
+        self.spawn_count[games] = 0
+        self.ticks[games] = 0
+        self.game_over[games] = False
+        self.winner[games] = -1
+        self.ate[games] = False
+        self.board_full[games] = False
+        self._spawn_food(games)
+        self.food_spawned[games] = False
+
+    def _spawn_food(self, games):
+        if len(games) == 0:
+            return
+        free_count = self.free_count[games]
+        full = free_count == 0
+        self.food[games[full]] = -1
+        self.board_full[games[full]] = True
+
+        games, free_count = games[~full], free_count[~full]
+        if len(games) == 0:
+            return
+        k = random_u64(self.seeds[games], self.spawn_count[games]) % free_count.astype(np.uint64)
+        self.spawn_count[games] += np.uint64(1)
+        self.food[games] = self.free_cells[games, k.astype(np.int64)]
+        self.food_spawned[games] = True
+
+    def _occupy(self, games, cells):
+        self.occupied[games, cells] += 1
+        became = self.occupied[games, cells] == 1
+        games, cells = games[became], cells[became]
+        # Swap-remove the cells from the free lists
+        idx = self.free_index[games, cells]
+        last = self.free_count[games] - 1
+        last_cell = self.free_cells[games, last]
+        self.free_cells[games, idx] = last_cell
+        self.free_index[games, last_cell] = idx
+        self.free_index[games, cells] = -1
+        self.free_count[games] = last
+
+    def _vacate(self, games, cells):
+        self.occupied[games, cells] -= 1
+        became = self.occupied[games, cells] == 0
+        games, cells = games[became], cells[became]
+        count = self.free_count[games]
+        self.free_cells[games, count] = cells
+        self.free_index[games, cells] = count
+        self.free_count[games] = count + 1
+
+    def step(self, actions):
+        # Advance every running game by one tick. `actions` has shape
+        # (num_games, num_snakes) with direction codes, -1 for no change.
+        actions = np.asarray(actions, dtype=np.int8).reshape(self.num_games, self.num_snakes)
+        games = self._games[~self.game_over]
+        if len(games) == 0:
+            return self
+        self.food_spawned[games] = False
+
+        g = games[:, None]
+        snake_ids = np.arange(self.num_snakes)[None, :]
+        c = self.num_cells
+
+        # Ignore requests to reverse into the snake's own neck
+        direction = self.directions[games]
+        action = actions[games]
+        turn = (action >= 0) & (action != (direction ^ 1))
+        direction = np.where(turn, action, direction)
+        self.directions[games] = direction
+
+        # Move heads with wrap-around
+        start = self.body_start[games]
+        length = self.lengths[games]
+        head = self.bodies[g, snake_ids, start].astype(np.int64)
+        col = (head % self.cols + _DX[direction]) % self.cols
+        row = (head // self.cols + _DY[direction]) % self.rows
+        new_head = row * self.cols + col
+
+        tail_slot = (start + length - 1) % c
+        tail = self.bodies[g, snake_ids, tail_slot]
+
+        new_start = (start - 1) % c
+        self.bodies[g, snake_ids, new_start] = new_head
+        self.body_start[games] = new_start
+
+        ate = new_head == self.food[games][:, None]
+        self.ate[games] = ate
+        self.lengths[games] = length + ate
+
+        # Update occupancy and free lists snake by snake, head before tail, in
+        # the same order as the scalar engine. Snakes that didn't eat drop their tail.
+        for idx in range(self.num_snakes):
+            self.occupancy[games, idx, new_head[:, idx]] += 1
+            self._occupy(games, new_head[:, idx])
+            keep = ~ate[:, idx]
+            self.occupancy[games[keep], idx, tail[keep, idx]] -= 1
+            self._vacate(games[keep], tail[keep, idx].astype(np.int64))
+
+        self._spawn_food(games[ate.any(axis=1)])
+        self.ticks[games] += 1
+
+        # Game over conditions, in the same order as the original game_loop
+        head1 = new_head[:, 0]
+        self_hit1 = self.occupancy[games, 0, head1] >= 2
+        if self.num_snakes == 1:
+            over = self_hit1
+            winner = np.full(len(games), -1, dtype=np.int8)
+        else:
+            head2 = new_head[:, 1]
+            head_on = head1 == head2
+            self_hit2 = self.occupancy[games, 1, head2] >= 2
+            hit12 = (self.occupancy[games, 1, head1].astype(np.int64) - head_on) > 0
+            hit21 = (self.occupancy[games, 0, head2].astype(np.int64) - head_on) > 0
+            over = self_hit1 | self_hit2 | hit12 | hit21 | head_on
+            winner = np.select([self_hit1, self_hit2, hit12, hit21], [1, 0, 1, 0], default=-1).astype(np.int8)
+        # Nowhere left to put food
+        over = over | self.board_full[games]
+        self.game_over[games] = over
+        self.winner[games] = np.where(over, winner, -1)
+        return self
+
+    def body(self, game, snake):
+        # Body cells of one snake as a list, head first
+        start, length = self.body_start[game, snake], self.lengths[game, snake]
+        return self.bodies[game, snake, (start + np.arange(length)) % self.num_cells].tolist()
+
+    def game_state(self, game):
+        # Snapshot of one game as a scalar snake_engine.GameState
+        snakes = [snake_engine.Snake(self.body(game, idx), DIRECTIONS[self.directions[game, idx]])
+                  for idx in range(self.num_snakes)]
+        food = int(self.food[game]) if self.food[game] >= 0 else None
+        state = snake_engine.GameState(self.cols, self.rows, snakes, food, int(self.seeds[game]))
+        state.spawn_count = int(self.spawn_count[game])
+        state.tick = int(self.ticks[game])
+        state.game_over = bool(self.game_over[game])
+        state.winner = None if self.winner[game] < 0 else int(self.winner[game])
+        state.ate = [bool(ate) for ate in self.ate[game]]
+        state.food_spawned = bool(self.food_spawned[game])
+        state.board_full = bool(self.board_full[game])
+        state.free_cells = self.free_cells[game, :self.free_count[game]].tolist()
+        state.free_index = self.free_index[game].tolist()
+        return state
@@ -0,0 +1,325 @@
+# Performance benchmarks, run headless with a synthetic camera:
+#
+#   python benchmark.py                  # run, compare with the baseline
+#   python benchmark.py --save-baseline  # run, store the results as the new baseline
+#   python benchmark.py --only engine    # only results whose name starts with "engine"
+#
+# Measures game-logic ticks per second for several snake lengths and board
+# sizes, process_camera_frame throughput at 480p / 720p / 1080p input, each
+# game's startup (time to the first menu frame and until the camera
+# delivers), the time to draw the snakes and food in both games (colour
+# rectangles in snake_game.py, icons in snake_game2.py) and end-to-end
+# game frame times. Results are compared with benchmark_baseline.json; anything worse
+# than its baseline by more than the allowed threshold is reported as a
+# regression and the exit status is 1. Baselines are machine specific, so
+# save one on the machine the comparison runs on.
+import argparse
+import json
+import os
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SNAKE_CAMERA_SOURCE', 'synthetic:noise')
+
+import numpy as np
+
+import snake_engine
+from camera_pipeline import CameraFrameProcessor
+from frame_sources import SyntheticSource
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+DEFAULT_THRESHOLD = 0.25  # Allowed slowdown relative to the baseline
+
+BOARD_SIZES = [(20, 15), (30, 20), (60, 40)]
+SNAKE_LENGTHS = [3, 50, 250]
+CAMERA_RESOLUTIONS = {'480p': (640, 480), '720p': (1280, 720), '1080p': (1920, 1080)}
+RENDER_SNAKE_LENGTH = 40
+
+
+class _StopBenchmark(Exception):
+    pass
+
+
+def median_time(run, repeats=5):
+    # Median of several timed runs, so a run disturbed by other work on the
+    # machine (or an unusually fast one) doesn't decide the result
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+def cycle_directions(cols, rows):
+    # A closed path through every cell of the board, as the direction to
+    # move in from each cell. Column 0 is the way back up; the other columns
+    # are covered row by row in a zigzag. Needs an even number of rows, or
+    # an even number of columns (then the path is built transposed).
+    if rows % 2:
+        if cols % 2:
+            raise ValueError("Board needs an even number of rows or columns")
+        swap = {snake_engine.UP: snake_engine.LEFT, snake_engine.DOWN: snake_engine.RIGHT,
+                snake_engine.LEFT: snake_engine.UP, snake_engine.RIGHT: snake_engine.DOWN}
+        transposed = cycle_directions(rows, cols)
+        return [swap[transposed[col * rows + row]] for row in range(rows) for col in range(cols)]
+
+    directions = []
+    for row in range(rows):
+        for col in range(cols):
+            if col == 0:
+                directions.append(snake_engine.RIGHT if row == 0 else snake_engine.UP)
+            elif row % 2 == 0:
+                directions.append(snake_engine.RIGHT if col < cols - 1 else snake_engine.DOWN)
+            elif col > 1 or row == rows - 1:
+                directions.append(snake_engine.LEFT)
+            else:
+                directions.append(snake_engine.DOWN)
+    return directions
+
+
+def cycle_path(cols, rows, directions):
+    # Cells along the closed path, starting at the top-left corner
+    path = [0]
+    while len(path) < cols * rows:
+        dx, dy = snake_engine.DIRECTION_DELTAS[directions[path[-1]]]
+        row, col = divmod(path[-1], cols)
+        path.append(((row + dy) % rows) * cols + (col + dx) % cols)
+    return path
+
+
+def path_snake(path, directions, start, length):
+    # Snake lying on path[start:start + length], heading along the path
+    body = path[start + length - 1:start - 1 if start else None:-1]
+    return snake_engine.Snake(body, directions[body[1]])
+
+
+def cycle_state(cols, rows, lengths, directions):
+    # Game state with snakes of the given lengths lying one after another on
+    # the closed path, and no food, so following the path they never die or grow
+    path = cycle_path(cols, rows, directions)
+    snakes = []
+    start = 0
+    for length in lengths:
+        snakes.append(path_snake(path, directions, start, length))
+        start += length + 2
+    return snake_engine.GameState(cols, rows, snakes, None, 0)
+
+
+def bench_engine(ticks=20000):
+    results = {}
+    for cols, rows in BOARD_SIZES:
+        directions = cycle_directions(cols, rows)
+        for length in SNAKE_LENGTHS:
+            if length >= cols * rows:
+                continue
+            state = cycle_state(cols, rows, [length], directions)
+            snake = state.snakes[0]
+
+            def run():
+                for _ in range(ticks):
+                    snake_engine.step(state, (directions[snake.body[0]],))
+
+            elapsed = median_time(run)
+            assert not state.game_over
+            results[f'engine_ticks_{cols}x{rows}_len{length}'] = (ticks / elapsed, 'ticks/s', True)
+    return results
+
+
+def bench_camera(game_width=1200, game_height=800, frames=100):
+    results = {}
+    processor = CameraFrameProcessor(game_width, game_height)
+    for name, (width, height) in CAMERA_RESOLUTIONS.items():
+        source = SyntheticSource('noise', width, height, fps=None)
+        frames_in = [source.read()[1] for _ in range(8)]
+        processor.process(frames_in[0])
+        elapsed = median_time(lambda: [processor.process(frames_in[idx % len(frames_in)]) for idx in range(frames)], 3)
+        results[f'process_camera_frame_{name}'] = (frames / elapsed, 'frames/s', True)
+    return results
+
+
+def render_state(game, length=RENDER_SNAKE_LENGTH):
+    # Two snakes of `length` on the game's board, for the render benchmarks
+    cols, rows = game.GAME_WIDTH // game.BLOCK_SIZE, game.GAME_HEIGHT // game.BLOCK_SIZE
+    directions = cycle_directions(cols, rows)
+    state = cycle_state(cols, rows, [length, length], directions)
+    state.food = state.free_cells[-1]
+    if hasattr(game, 'load_icons'):
+        game.load_icons()
+        for snake in state.snakes:
+            snake.tags = [game.DEFAULT_BODY_ICON] * len(snake.body)
+        state.food_tag = game.FOOD_ICONS[0] if game.FOOD_ICONS else None
+    return state
+
+
+def bench_startup(game, timeout=10.0):
+    # Start the game and present its first menu frame, then wait for the
+    # background startup work (camera, assets) to finish
+    import pygame
+
+    startup = game.start()
+    game.draw_main_menu(pygame.Surface((game.GAME_WIDTH, game.GAME_HEIGHT)))
+    startup.wait(timeout)
+    return {
+        f'startup_{game.__name__}_first_frame_ms': (startup.metrics['first_frame_ms'], 'ms', False),
+        f'startup_{game.__name__}_camera_ms': (startup.metrics.get('camera_ms', timeout * 1000.0), 'ms', False),
+    }
+
+
+def bench_render(game, frames=100):
+    # The game's per-frame snake drawing: the playfield layer composited
+    # onto the game surface, plus the sliding heads and tails
+    import pygame
+    from playfield import Playfield
+
+    state = render_state(game)
+    playfield = Playfield(game.GAME_WIDTH, game.GAME_HEIGHT, game.BLOCK_SIZE)
+    game.update_playfield(playfield, state, full=True)
+    # Move once so interpolation has a previous position to blend from
+    directions = cycle_directions(state.cols, state.rows)
+    snake_engine.step(state, [directions[snake.head] for snake in state.snakes])
+    game.update_playfield(playfield, state)
+    surface = pygame.Surface((game.GAME_WIDTH, game.GAME_HEIGHT))
+    elapsed = median_time(lambda: [game.draw_playfield(surface, playfield, state, 0.5) for _ in range(frames)])
+    return {f'render_{game.__name__}_ms': (elapsed / frames * 1000.0, 'ms/frame', False)}
+
+
+def bench_end_to_end(game, frames=300, warmup=30):
+    # Runs the real game scene (camera read and processing, drawing, output)
+    # at full background quality, without frame rate limit or countdown,
+    # and stops it after `frames` presented frames (or at game over)
+    from quality_governor import LEVEL_FULL
+
+    saved = {name: getattr(game, name) for name in ('RENDER_FPS', 'BACKGROUND_QUALITY', 'GameOverScene', 'scale_and_center')}
+    scale_and_center = game.scale_and_center
+    times = []
+
+    def timed_scale_and_center(*args, **kwargs):
+        scale_and_center(*args, **kwargs)
+        times.append(time.perf_counter())
+        if len(times) > frames + warmup:
+            raise _StopBenchmark()
+
+    def game_over(*args):
+        raise _StopBenchmark()
+
+    game.RENDER_FPS = 10000
+    game.BACKGROUND_QUALITY = LEVEL_FULL
+    game.GameOverScene = game_over
+    game.scale_and_center = timed_scale_and_center
+    try:
+        game.run(game.GameScene(single_player=False))
+    except _StopBenchmark:
+        pass
+    finally:
+        for name, value in saved.items():
+            setattr(game, name, value)
+    if len(times) < warmup + 2:
+        raise RuntimeError(f"{game.__name__}: the game ended after {len(times)} frames, before the "
+                           f"{warmup} warm-up frames and at least one timed frame were presented")
+    intervals = np.diff(times[warmup:]) * 1000.0
+    return {
+        f'end_to_end_{game.__name__}_p50_ms': (float(np.percentile(intervals, 50)), 'ms/frame', False),
+        f'end_to_end_{game.__name__}_p95_ms': (float(np.percentile(intervals, 95)), 'ms/frame', False),
+    }
+
+
+def bench_game(name):
+    # Startup, render and end-to-end benchmarks of one game. The game is only
+    # started here, and its camera stopped afterwards, so its capture thread
+    # doesn't disturb the other benchmarks.
+    import importlib
+
+    game = importlib.import_module(name)
+    try:
+        results = bench_startup(game)
+        results.update(bench_render(game))
+        results.update(bench_end_to_end(game))
+    finally:
+        game.camera.release()
+    return results
+
+
+def run(only=None):
+    # Benchmark groups with the prefixes of the results they produce
+    benchmarks = [
+        (('engine_ticks_',), bench_engine),
+        (('process_camera_frame_',), bench_camera),
+        (('startup_snake_game_', 'render_snake_game_', 'end_to_end_snake_game_'), lambda: bench_game('snake_game')),
+        (('startup_snake_game2_', 'render_snake_game2_', 'end_to_end_snake_game2_'), lambda: bench_game('snake_game2')),
+    ]
+
+    results = {}
+    for prefixes, bench in benchmarks:
+        if only is not None and not any(prefix.startswith(only) or only.startswith(prefix) for prefix in prefixes):
+            continue
+        for key, (value, unit, higher_is_better) in bench().items():
+            if only is not None and not key.startswith(only):
+                continue
+            results[key] = {'value': round(value, 3), 'unit': unit, 'higher_is_better': higher_is_better}
+            print(f"{key:<45}{value:>14.3f} {unit}")
+    return results
+
+
+def compare(results, baseline):
+    # Names of the results that are worse than the baseline by more than
+    # its threshold
+    regressions = []
+    for key, result in results.items():
+        reference = baseline.get('results', {}).get(key)
+        if reference is None:
+            continue
+        threshold = reference.get('threshold', baseline.get('default_threshold', DEFAULT_THRESHOLD))
+        if result['higher_is_better']:
+            change = reference['value'] / result['value'] - 1.0 if result['value'] else float('inf')
+        else:
+            change = result['value'] / reference['value'] - 1.0 if reference['value'] else 0.0
+        status = 'REGRESSION' if change > threshold else 'ok'
+        print(f"{key:<45}{change * 100:>+8.1f}% slowdown (allowed {threshold * 100:.0f}%)  {status}")
+        if change > threshold:
+            regressions.append(key)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Battle snake performance benchmarks")
+    parser.add_argument('--save-baseline', action='store_true', help="store the results as the new baseline")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="baseline JSON file")
+    parser.add_argument('--only', help="only run benchmarks whose result names start with this")
+    args = parser.parse_args()
+
+    results = run(args.only)
+
+    if args.save_baseline:
+        baseline = {'default_threshold': DEFAULT_THRESHOLD, 'results': results}
+        if os.path.exists(args.baseline):
+            # Keep hand-tuned thresholds and results of benchmarks not run now
+            with open(args.baseline) as f:
+                previous = json.load(f)
+            baseline['default_threshold'] = previous.get('default_threshold', DEFAULT_THRESHOLD)
+            for key, result in previous.get('results', {}).items():
+                if key not in results:
+                    baseline['results'][key] = result
+                elif 'threshold' in result:
+                    results[key]['threshold'] = result['threshold']
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    print()
+    regressions = compare(results, baseline)
+    if regressions:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
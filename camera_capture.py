@@ -0,0 +1,165 @@
+import threading
+import time
+
+from frame_sources import open_frame_source
+
+class CameraCapture:
+    # Owns a frame source (the webcam by default, see frame_sources) and
+    # reads it on a background thread, so the render loops never wait on the
+    # webcam driver. Only the newest frame is kept; anything the game did not
+    # pick up in time is counted as dropped.
+    #
+    # The source is opened at width x height and fps (for a webcam, the
+    # capture mode requested from the driver), and the negotiated mode and
+    # measured frame rate are printed once the first REPORT_AFTER_FRAMES
+    # frames have arrived.
+    #
+    # Creating a CameraCapture opens nothing. The source is opened by
+    # start(), on the capture thread, since opening a webcam can take a
+    # second or more; read() returns no frame until it is up.
+    REPORT_AFTER_FRAMES = 30
+    RETRY_DELAY = 0.01     # Wait after a failed read; doubles with every failure in a row
+    MAX_RETRY_DELAY = 0.5
+
+    def __init__(self, source=0, width=None, height=None, fps=30):
+        self.source_spec = source
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.source = None
+        self.mode = None
+        self.open_ms = None  # How long opening the source took
+        self._lock = threading.Lock()
+        self._first_frame = threading.Event()
+        self._thread = None
+        self._running = False
+        self._release_pending = False
+
+        # Latest-frame slot (protected by _lock)
+        self._frame = None
+        self._frame_time = 0.0
+        self._frame_consumed = True
+
+        # Counters
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self.read_failures = 0
+        self.capture_latency_ms = 0.0      # Time spent inside source.read() for the last frame
+        self.avg_capture_latency_ms = 0.0  # Exponential moving average of the above
+        self.measured_fps = 0.0            # Frames delivered per second, averaged
+        self._first_frame_time = None
+
+    def open(self):
+        # Open the source now, if it isn't open yet
+        if self.source is None:
+            start = time.perf_counter()
+            source = open_frame_source(self.source_spec, self.width, self.height, self.fps)
+            self.mode = source.mode
+            self.open_ms = (time.perf_counter() - start) * 1000.0
+            self.source = source
+        return self
+
+    def start(self):
+        if self._thread is not None:
+            return self
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="CameraCapture", daemon=True)
+        self._thread.start()
+        return self
+
+    def wait_for_frame(self, timeout=None):
+        # Block until the first frame has arrived; False on timeout
+        return self._first_frame.wait(timeout)
+
+    def _run(self):
+        self.open()
+        retry_delay = self.RETRY_DELAY
+        while self._running:
+            start = time.perf_counter()
+            ret, frame = self.source.read()
+            now = time.perf_counter()
+            if not ret:
+                self.read_failures += 1
+                # Don't spin on a camera that is not delivering frames (or
+                # isn't there at all); back off while it keeps failing
+                time.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, self.MAX_RETRY_DELAY)
+                continue
+            retry_delay = self.RETRY_DELAY
+
+            latency_ms = (now - start) * 1000.0
+            with self._lock:
+                if not self._frame_consumed:
+                    self.frames_dropped += 1
+                self._frame = frame
+                self._frame_time = now
+                self._frame_consumed = False
+                self.frames_captured += 1
+                self.capture_latency_ms = latency_ms
+                if self.frames_captured == 1:
+                    self.avg_capture_latency_ms = latency_ms
+                    self._first_frame_time = now
+                    self._first_frame.set()
+                else:
+                    self.avg_capture_latency_ms += 0.1 * (latency_ms - self.avg_capture_latency_ms)
+                    self.measured_fps = (self.frames_captured - 1) / (now - self._first_frame_time)
+
+            if self.frames_captured == self.REPORT_AFTER_FRAMES:
+                self.report()
+
+        if self._release_pending:
+            self.source.release()
+
+    def report(self):
+        if self.mode is not None and 'fourcc' in self.mode:
+            print(f"Camera mode: {self.mode['width']}x{self.mode['height']} {self.mode['fourcc'] or '?'} "
+                  f"@ {self.mode['fps']:.0f} fps, buffer size {self.mode['buffer_size']}")
+        elif self.mode is not None:
+            print(f"Frame source: {self.mode}")
+        frame = self._frame
+        if frame is not None:
+            print(f"Camera delivers {frame.shape[1]}x{frame.shape[0]} at {self.measured_fps:.1f} fps "
+                  f"(read latency {self.avg_capture_latency_ms:.1f} ms)")
+
+    def read(self):
+        # Same contract as cv2.VideoCapture.read(), but never blocks: returns
+        # the newest frame (possibly one already returned before), or
+        # (False, None) until the first frame has arrived.
+        with self._lock:
+            frame = self._frame
+            self._frame_consumed = True
+        if frame is None:
+            return False, None
+        return True, frame
+
+    def frame_age_ms(self):
+        # How old the frame returned by read() is right now
+        with self._lock:
+            if self._frame is None:
+                return None
+            return (time.perf_counter() - self._frame_time) * 1000.0
+
+    def stats(self):
+        return {
+            'frames_captured': self.frames_captured,
+            'frames_dropped': self.frames_dropped,
+            'read_failures': self.read_failures,
+            'capture_latency_ms': self.capture_latency_ms,
+            'avg_capture_latency_ms': self.avg_capture_latency_ms,
+            'measured_fps': self.measured_fps,
+            'mode': self.mode,
+            'frame_age_ms': self.frame_age_ms(),
+        }
+
+    def release(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            if self._thread.is_alive():
+                # Still opening the source; the thread releases it once it
+                # sees it has been stopped
+                self._release_pending = True
+                return
+            self._thread = None
+        if self.source is not None:
+            self.source.release()
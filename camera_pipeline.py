@@ -0,0 +1,118 @@
+from functools import lru_cache
+
+import cv2
+import numpy as np
+import pygame
+
+# Background processing qualities, best first. HALF resizes the camera
+# image to half the output size and enlarges it again with nearest-neighbour
+# sampling; GRAY does the same in grayscale and shows it through an 8-bit
+# palette surface, which is also cheaper to blit.
+QUALITY_FULL, QUALITY_HALF, QUALITY_GRAY = range(3)
+
+GRAY_PALETTE = [(i, i, i) for i in range(256)]
+
+
+@lru_cache(maxsize=16)
+def camera_geometry(frame_width, frame_height, width, height):
+    # Scale factor and the centered part of the camera frame that is visible
+    # once the frame is scaled to cover a width x height area. Computed once
+    # per (camera resolution, output resolution) pair.
+    if frame_width / frame_height > width / height:
+        # Frame is wider than game surface
+        scale_factor = height / frame_height
+    else:
+        # Frame is taller than game surface
+        scale_factor = width / frame_width
+    visible_width = min(frame_width, round(width / scale_factor))
+    visible_height = min(frame_height, round(height / scale_factor))
+    # The frame is mirrored after cropping, so take the horizontal offset
+    # from the right-hand side
+    x = frame_width - visible_width - (frame_width - visible_width) // 2
+    y = (frame_height - visible_height) // 2
+    return scale_factor, x, y, visible_width, visible_height
+
+
+class CameraFrameProcessor:
+    # Turns camera frames into the mirrored game background without
+    # allocating per frame. The background surface is created once on top of
+    # a NumPy buffer we own, so OpenCV writes straight into its pixels.
+    #
+    # Like the original process_camera_frame, the frame is scaled to cover the
+    # whole output area and the overflow is cut off. Each frame is:
+    #   1. crop the visible part and resize it to the output size (in BGR,
+    #      so the full-resolution frame is only read once),
+    #   2. flip it horizontally into the surface buffer.
+    # The surface uses BGR pixel order, so the colour conversion happens in
+    # the blit onto the game surface instead of as a separate pass.
+    #
+    # Lower qualities (see QUALITY_HALF / QUALITY_GRAY) trade detail for
+    # time, and with reuse=True the last background is returned as is.
+    #
+    # pixels optionally gives the (height, width, 3) uint8 array to render
+    # the background into instead of one of our own, e.g. shared memory.
+    def __init__(self, width, height, pixels=None):
+        self.width = None
+        self.height = None
+        self._frame_shape = None
+        self.set_output_size(width, height, pixels)
+
+    def set_output_size(self, width, height, pixels=None):
+        # Reallocate the output buffers, only if the size actually changed
+        if (width, height) == (self.width, self.height):
+            return
+        self.width = width
+        self.height = height
+        self._pixels = pixels if pixels is not None else np.zeros((height, width, 3), dtype=np.uint8)
+        self._resized = np.empty((height, width, 3), dtype=np.uint8)
+        self.background = pygame.image.frombuffer(self._pixels, (width, height), "BGR")
+        half_width, half_height = max(1, width // 2), max(1, height // 2)
+        self._half = np.empty((half_height, half_width, 3), dtype=np.uint8)
+        self._half_gray = np.empty((half_height, half_width), dtype=np.uint8)
+        self._gray = np.zeros((height, width), dtype=np.uint8)
+        self.gray_background = pygame.image.frombuffer(self._gray, (width, height), "P")
+        self.gray_background.set_palette(GRAY_PALETTE)
+        self._frame_shape = None
+        self._last = None
+        self.updated = False  # Whether the last process() call drew a new background
+
+    def _configure(self, frame_shape):
+        frame_height, frame_width = frame_shape[:2]
+        self.scale_factor, x, y, visible_width, visible_height = camera_geometry(
+            frame_width, frame_height, self.width, self.height)
+        self._crop = (slice(y, y + visible_height), slice(x, x + visible_width))
+        self._frame_shape = frame_shape
+
+    def process(self, frame, quality=QUALITY_FULL, reuse=False):
+        # Returns the background surface, the frame's offsets in it, the scale
+        # factor and the visible frame as an RGB array (a view into the
+        # background, so it is only valid until the next call; not updated
+        # at QUALITY_GRAY)
+        if reuse and self._last is not None:
+            self.updated = False
+            return self._last
+
+        if frame.shape != self._frame_shape:
+            self._configure(frame.shape)
+
+        size = (self.width, self.height)
+        if quality == QUALITY_FULL:
+            cv2.resize(frame[self._crop], size, dst=self._resized, interpolation=cv2.INTER_LINEAR)
+            cv2.flip(self._resized, 1, dst=self._pixels)  # Flip horizontally to mirror the image
+            surface = self.background
+        else:
+            half_size = (self._half.shape[1], self._half.shape[0])
+            cv2.resize(frame[self._crop], half_size, dst=self._half, interpolation=cv2.INTER_LINEAR)
+            if quality == QUALITY_HALF:
+                cv2.flip(self._half, 1, dst=self._half)
+                cv2.resize(self._half, size, dst=self._pixels, interpolation=cv2.INTER_NEAREST)
+                surface = self.background
+            else:
+                cv2.cvtColor(self._half, cv2.COLOR_BGR2GRAY, dst=self._half_gray)
+                cv2.flip(self._half_gray, 1, dst=self._half_gray)
+                cv2.resize(self._half_gray, size, dst=self._gray, interpolation=cv2.INTER_NEAREST)
+                surface = self.gray_background
+
+        self.updated = True
+        self._last = (surface, 0, 0, self.scale_factor, self._pixels[:, :, ::-1])
+        return self._last
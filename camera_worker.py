@@ -0,0 +1,217 @@
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+import pygame
+
+from camera_pipeline import CameraFrameProcessor, QUALITY_FULL
+from frame_sources import open_frame_source
+
+# Shared memory layout: a header followed by three BGR frame slots of the
+# output size. The header holds int64 [sequence, front slot, claimed slot,
+# -] and float64 [scale factor]; the sequence counts the frames published
+# so far (0: none yet), the front slot is the one holding the newest frame
+# and the claimed slot is the one the game is showing.
+HEADER_SIZE = 64
+SLOTS = 3
+SEQUENCE, FRONT, CLAIMED = 0, 1, 2
+
+
+def map_frame_buffer(buffer, width, height):
+    # NumPy views of the header fields and the frame slots in `buffer`
+    counters = np.ndarray((4,), dtype=np.int64, buffer=buffer)
+    scale = np.ndarray((1,), dtype=np.float64, buffer=buffer, offset=32)
+    slot_size = width * height * 3
+    slots = [np.ndarray((height, width, 3), dtype=np.uint8, buffer=buffer, offset=HEADER_SIZE + i * slot_size)
+             for i in range(SLOTS)]
+    return counters, scale, slots
+
+
+def run_worker(name, source, width, height, fps, output_width, output_height, lock, stop):
+    # Worker process: capture frames, turn them into the game background and
+    # publish them in the shared memory block `name` until stop is set
+    shm = shared_memory.SharedMemory(name=name)
+    counters, scale, slots = map_frame_buffer(shm.buf, output_width, output_height)
+    # One processor per slot, each rendering straight into its slot
+    processors = [CameraFrameProcessor(output_width, output_height, slot) for slot in slots]
+    frame_source = open_frame_source(source, width, height, fps)
+
+    retry_delay = CameraWorker.RETRY_DELAY
+    try:
+        while not stop.is_set():
+            ret, frame = frame_source.read()
+            if not ret:
+                time.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, CameraWorker.MAX_RETRY_DELAY)
+                continue
+            retry_delay = CameraWorker.RETRY_DELAY
+
+            # Fill a slot that holds neither the newest frame nor the one the
+            # game claimed, then make it the front one
+            with lock:
+                back = next(i for i in range(SLOTS) if i != counters[FRONT] and i != counters[CLAIMED])
+            processors[back].process(frame, QUALITY_FULL)
+            with lock:
+                scale[0] = processors[back].scale_factor
+                counters[FRONT] = back
+                counters[SEQUENCE] += 1
+    finally:
+        frame_source.release()
+        del counters, scale, slots, processors
+        shm.close()
+
+
+class SharedFrameProcessor:
+    # Stands in for camera_pipeline.CameraFrameProcessor with a CameraWorker:
+    # the worker's slots already hold the finished background, so process()
+    # claims the newest slot and hands out the surface made over it. Nothing
+    # is copied; the surface reads the shared memory.
+    #
+    # The worker never writes the claimed slot, so the surface (and the RGB
+    # view of it) stays as it is until the next process() call that doesn't
+    # reuse it, like CameraFrameProcessor's background.
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self._counters = None
+        self._slots = []
+        self._surfaces = []
+        self._scale = None
+        self._lock = None
+        self._sequence = 0  # Sequence number of the frame in the claimed slot
+        self._last = None
+        self.updated = False
+
+    def attach(self, counters, slots, scale, lock):
+        self._counters = counters
+        self._slots = slots
+        self._surfaces = [pygame.image.frombuffer(slot, (self.width, self.height), "BGR") for slot in slots]
+        self._scale = scale
+        self._lock = lock
+
+    def detach(self):
+        self._counters = None
+        self._slots = []
+        self._surfaces = []
+        self._scale = None
+        self._lock = None
+        self._sequence = 0
+        self._last = None
+
+    def process(self, frame, quality=QUALITY_FULL, reuse=False):
+        # Same results as CameraFrameProcessor.process(); frame is what
+        # CameraWorker.read() returned, but the newest published frame is
+        # used. The worker always renders at full quality, since that costs
+        # the game process nothing.
+        if reuse and self._last is not None:
+            self.updated = False
+            return self._last
+        with self._lock:
+            sequence = int(self._counters[SEQUENCE])
+            if sequence == self._sequence and self._last is not None:
+                self.updated = False  # Nothing new published since the last claim
+                return self._last
+            index = int(self._counters[FRONT])
+            self._counters[CLAIMED] = index
+            scale_factor = float(self._scale[0])
+        self._sequence = sequence
+        self.updated = True
+        self._last = (self._surfaces[index], 0, 0, scale_factor, self._slots[index][:, :, ::-1])
+        return self._last
+
+
+class CameraWorker:
+    # Drop-in replacement for camera_capture.CameraCapture that captures and
+    # processes the camera in a separate process, so the flip, crop and
+    # resize don't compete with the game for the GIL (or, on a multi-core
+    # machine, for its core). The worker publishes every finished background
+    # into a shared memory triple buffer: it always writes a slot that holds
+    # neither the newest frame nor the one the game has claimed, then makes
+    # it the front slot and bumps the sequence. Picking that slot and
+    # claiming one happen under a shared lock, so the game never shows a
+    # slot while the worker is writing it.
+    #
+    # read() returns the front slot, already mirrored and at the output
+    # size, and `processor` claims the newest slot and turns it into the
+    # background surface without copying.
+    #
+    # Like CameraCapture, creating one opens nothing; start() creates the
+    # shared memory and launches the worker.
+    RETRY_DELAY = 0.01     # Wait after a failed read; doubles with every failure in a row
+    MAX_RETRY_DELAY = 0.5
+
+    def __init__(self, source, width, height, output_width, output_height, fps=30):
+        self.source_spec = source
+        self.width = width
+        self.height = height
+        self.output_width = output_width
+        self.output_height = output_height
+        self.fps = fps
+        self.processor = SharedFrameProcessor(output_width, output_height)
+        self.mode = 'worker process'
+        self._shm = None
+        self._counters = None
+        self._slots = None
+        self._process = None
+        self._stop = None
+
+    def start(self):
+        if self._process is not None:
+            return self
+        size = HEADER_SIZE + SLOTS * self.output_width * self.output_height * 3
+        self._shm = shared_memory.SharedMemory(create=True, size=size)
+        self._counters, scale, self._slots = map_frame_buffer(self._shm.buf, self.output_width, self.output_height)
+        self._counters[:] = 0
+
+        # Spawn rather than fork: the game process has threads and a window
+        context = multiprocessing.get_context('spawn')
+        lock = context.Lock()
+        self.processor.attach(self._counters, self._slots, scale, lock)
+        self._stop = context.Event()
+        process = context.Process(
+            target=run_worker, name="CameraWorker", daemon=True,
+            args=(self._shm.name, self.source_spec, self.width, self.height, self.fps,
+                  self.output_width, self.output_height, lock, self._stop))
+        process.start()
+        # Only once it is running, so release() doesn't join a process that
+        # never started
+        self._process = process
+        return self
+
+    def wait_for_frame(self, timeout=None):
+        # Block until the first frame has been published; False on timeout
+        # or if the worker died
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while self.frames_published() == 0:
+            if not self._process.is_alive() or (deadline is not None and time.perf_counter() > deadline):
+                return False
+            time.sleep(0.01)
+        return True
+
+    def frames_published(self):
+        return 0 if self._counters is None else int(self._counters[SEQUENCE])
+
+    def read(self):
+        # Never blocks: the newest published frame, or (False, None) until
+        # the first one is there
+        if self.frames_published() == 0:
+            return False, None
+        return True, self._slots[self._counters[FRONT]]
+
+    def release(self):
+        if self._process is not None:
+            self._stop.set()
+            self._process.join(timeout=1.0)
+            if self._process.is_alive():
+                self._process.terminate()
+            self._process = None
+        if self._shm is not None:
+            self.processor.detach()
+            self._counters = self._slots = None
+            try:
+                self._shm.close()
+            except BufferError:
+                pass  # A view of a slot is still in use; the mapping goes with the process
+            self._shm.unlink()
+            self._shm = None
@@ -0,0 +1,148 @@
+import os
+
+import pygame
+
+
+class DisplayOutput:
+    # Owns the window and puts the fixed-size game surface on it. When the
+    # window is not the size of the game (fullscreen, or a resized window)
+    # the game surface is scaled to fit and centered. The window size, scale,
+    # position and the surface the game is scaled into are worked out once
+    # per display mode or resize instead of every frame.
+    #
+    # smooth_scaling picks bilinear (smoothscale) or the much cheaper
+    # nearest-neighbour scaling. With sdl_scaled the window uses pygame's
+    # SCALED mode instead: it always has the game's size and SDL scales it
+    # to the screen on the GPU. Switching to and from fullscreen changes the
+    # mode in place, without restarting the video subsystem, so surfaces
+    # converted for the display (e.g. convert_alpha() icons) stay valid.
+    #
+    # The window is only created by open(), so the game modules can set up
+    # their DisplayOutput at import time without opening anything.
+    def __init__(self, game_width, game_height, caption, smooth_scaling=True, resizable=False, sdl_scaled=False):
+        self.game_width = game_width
+        self.game_height = game_height
+        self.caption = caption
+        self.smooth_scaling = smooth_scaling
+        self.sdl_scaled = sdl_scaled
+        self.is_fullscreen = False
+        self.full_update_pending = True  # Next frame must repaint the whole window (e.g. after a mode change)
+        self.profiler = None  # Optional frame_profiler.FrameProfiler timing the output stages
+
+        self.window_flags = pygame.RESIZABLE if resizable else 0
+        if sdl_scaled:
+            self.window_flags |= pygame.SCALED
+        self.windowed_size = (game_width, game_height)
+        self.window = None
+
+    def open(self):
+        # Create the window, in windowed mode initially
+        if self.window is None:
+            if self.sdl_scaled:
+                # SDL reads the filtering of the scaled output from its hints
+                os.environ.setdefault('SDL_RENDER_SCALE_QUALITY', '1' if self.smooth_scaling else '0')
+            self.window = pygame.display.set_mode(self.windowed_size, self.window_flags)
+            pygame.display.set_caption(self.caption)
+            self._layout()
+        return self
+
+    def _layout(self):
+        # Cache the window size and where the scaled game surface goes on it
+        self.window_size = screen_width, screen_height = self.window.get_size()
+        self.scale = min(screen_width / self.game_width, screen_height / self.game_height)
+        scaled_width = int(self.game_width * self.scale)
+        scaled_height = int(self.game_height * self.scale)
+        self.scaled_rect = pygame.Rect((screen_width - scaled_width) // 2, (screen_height - scaled_height) // 2,
+                                       scaled_width, scaled_height)
+        self.scaling = self.scaled_rect.size != (self.game_width, self.game_height)
+        self._scaled_surface = None  # Allocated on first use, in the game surface's pixel format
+        self.full_update_pending = True
+
+    def handle_resize(self):
+        # Call on VIDEORESIZE; pygame has already resized the window surface
+        self.window = pygame.display.get_surface()
+        if self.window.get_size() == self.window_size:
+            return
+        if not self.is_fullscreen:
+            self.windowed_size = self.window.get_size()
+        self._layout()
+
+    def toggle_fullscreen(self):
+        self.is_fullscreen = not self.is_fullscreen
+        if self.sdl_scaled:
+            # Switch the existing window in place; SDL keeps scaling it
+            pygame.display.toggle_fullscreen()
+        elif self.is_fullscreen:
+            # Desktop resolution; the display itself stays initialized
+            self.window = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+        else:
+            self.window = pygame.display.set_mode(self.windowed_size, self.window_flags)
+        self._layout()
+
+    def _scale(self, game_surface, smooth):
+        scaled = self._scaled_surface
+        alpha_flag = game_surface.get_flags() & pygame.SRCALPHA
+        if (scaled is None or scaled.get_bitsize() != game_surface.get_bitsize()
+                or scaled.get_flags() & pygame.SRCALPHA != alpha_flag):
+            scaled = self._scaled_surface = pygame.Surface(self.scaled_rect.size, alpha_flag, game_surface)
+        if smooth:
+            pygame.transform.smoothscale(game_surface, self.scaled_rect.size, scaled)
+        else:
+            pygame.transform.scale(game_surface, self.scaled_rect.size, scaled)
+        return scaled
+
+    def present(self, game_surface, dirty_rects=None, background=None):
+        # dirty_rects lists the areas of game_surface that changed since the
+        # last frame (None: everything may have changed, []: nothing did).
+        # background is an optional surface of scaled_rect's size drawn below
+        # game_surface, which then has per-pixel alpha (transparent where the
+        # background shows through); it lets the camera be rendered at screen
+        # resolution instead of scaled up.
+        if self.full_update_pending:
+            dirty_rects = None
+            if self.window_size != (self.game_width, self.game_height):
+                # Clear the borders around the scaled game surface
+                self.window.fill((0, 0, 0))
+        self.full_update_pending = False
+        if dirty_rects is not None and not dirty_rects:
+            return
+
+        profiler = self.profiler
+        start = profiler.begin() if profiler is not None else 0
+        if self.scaling:
+            if background is not None:
+                self.window.blit(background, self.scaled_rect)
+                # Smoothing would blend the transparent pixels into the edges
+                self.window.blit(self._scale(game_surface, False), self.scaled_rect)
+            else:
+                self.window.blit(self._scale(game_surface, self.smooth_scaling), self.scaled_rect)
+
+            if dirty_rects is not None:
+                # Map the dirty areas to screen coordinates, rounding outwards
+                scale, pos_x, pos_y = self.scale, self.scaled_rect.x, self.scaled_rect.y
+                dirty_rects = [pygame.Rect(pos_x + int(rect[0] * scale), pos_y + int(rect[1] * scale),
+                                           int(rect[2] * scale) + 2, int(rect[3] * scale) + 2)
+                               for rect in dirty_rects]
+        elif dirty_rects is not None:
+            # At the game's own size, copy only the changed areas
+            pos_x, pos_y = self.scaled_rect.topleft
+            dirty_rects = [self.window.blit(game_surface, (pos_x + rect[0], pos_y + rect[1]), rect)
+                           for rect in dirty_rects]
+        else:
+            # At the game's own size, simply blit the game surface onto the window
+            if background is not None:
+                self.window.blit(background, self.scaled_rect)
+            self.window.blit(game_surface, self.scaled_rect)
+
+        if profiler is not None:
+            profiler.end('scale_and_center', start)
+            start = profiler.begin()
+
+        # Update the display
+        if dirty_rects is None:
+            pygame.display.update()
+        else:
+            pygame.display.update(dirty_rects)
+
+        if profiler is not None:
+            profiler.end('display_update', start)
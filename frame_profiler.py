@@ -0,0 +1,115 @@
+import atexit
+import csv
+import time
+from collections import deque
+
+import pygame
+
+# Render stages timed per frame, in the order they run
+STAGES = ('camera_read', 'process_camera_frame', 'game_logic', 'draw_snakes', 'scale_and_center', 'display_update')
+
+
+def percentile(sorted_samples, fraction):
+    return sorted_samples[min(len(sorted_samples) - 1, int(fraction * len(sorted_samples)))]
+
+
+class FrameProfiler:
+    # Times the stages of each rendered frame with perf_counter_ns. Wrap a
+    # stage as
+    #     start = profiler.begin()
+    #     ...
+    #     profiler.end('draw_snakes', start)
+    # and call frame_finished() once per frame. The last `window` samples of
+    # each stage are kept for p50 / p95 / p99, shown by draw_hud() while
+    # show_hud is set, and with csv_path every frame's timings are written
+    # as a CSV row (in milliseconds).
+    #
+    # While disabled, begin() and end() return straight away and nothing is
+    # recorded.
+    def __init__(self, enabled=False, window=300, csv_path=None, hud_interval=15):
+        self.enabled = enabled or csv_path is not None
+        self.show_hud = False
+        self.window = window
+        self.hud_interval = hud_interval
+        self.samples = {stage: deque(maxlen=window) for stage in STAGES + ('frame',)}
+        self.frames = 0
+        self._current = {}
+        self._last_frame_end = None
+        self._hud_surface = None
+
+        self._csv_file = None
+        self._csv_writer = None
+        if csv_path is not None:
+            self._csv_file = open(csv_path, 'w', newline='')
+            self._csv_writer = csv.writer(self._csv_file)
+            self._csv_writer.writerow(('frame',) + STAGES + ('frame_interval',))
+            atexit.register(self.close)
+
+    def begin(self):
+        if not self.enabled:
+            return 0
+        return time.perf_counter_ns()
+
+    def end(self, stage, start):
+        if not self.enabled:
+            return
+        # Stages may run more than once per frame; their times add up
+        self._current[stage] = self._current.get(stage, 0) + time.perf_counter_ns() - start
+
+    def toggle_hud(self):
+        # Profiling runs while the HUD is shown (or a CSV is being written)
+        self.show_hud = not self.show_hud
+        self.enabled = self.show_hud or self._csv_writer is not None
+        self._hud_surface = None
+        self._current = {}
+        self._last_frame_end = None
+
+    def frame_finished(self):
+        if not self.enabled:
+            return
+        now = time.perf_counter_ns()
+        interval = now - self._last_frame_end if self._last_frame_end is not None else 0
+        self._last_frame_end = now
+        current, self._current = self._current, {}
+        for stage, elapsed in current.items():
+            self.samples[stage].append(elapsed)
+        if interval:
+            self.samples['frame'].append(interval)
+        self.frames += 1
+
+        if self._csv_writer is not None:
+            self._csv_writer.writerow([self.frames] + [f"{current.get(stage, 0) / 1e6:.3f}" for stage in STAGES]
+                                      + [f"{interval / 1e6:.3f}"])
+
+    def summary(self):
+        # {stage: (p50, p95, p99)} in milliseconds, for stages with samples
+        result = {}
+        for stage, samples in self.samples.items():
+            if samples:
+                ordered = sorted(samples)
+                result[stage] = tuple(percentile(ordered, fraction) / 1e6 for fraction in (0.5, 0.95, 0.99))
+        return result
+
+    def draw_hud(self, surface, font, position=(10, 10)):
+        # Blit the stage percentiles onto surface and return the rect drawn
+        # on; the text is only re-rendered every hud_interval frames
+        if not self.show_hud:
+            return None
+        if self._hud_surface is None or self.frames % self.hud_interval == 0:
+            lines = [f"{'stage':<22}{'p50':>8}{'p95':>8}{'p99':>8}  ms"]
+            for stage, (p50, p95, p99) in self.summary().items():
+                lines.append(f"{stage:<22}{p50:>8.2f}{p95:>8.2f}{p99:>8.2f}")
+            rendered = [font.render(line, True, (255, 255, 255)) for line in lines]
+            line_height = font.get_linesize()
+            width = max(text.get_width() for text in rendered) + 10
+            self._hud_surface = pygame.Surface((width, line_height * len(rendered) + 10), pygame.SRCALPHA)
+            self._hud_surface.fill((0, 0, 0, 160))
+            for idx, text in enumerate(rendered):
+                self._hud_surface.blit(text, (5, 5 + idx * line_height))
+        return surface.blit(self._hud_surface, position)
+
+    def close(self):
+        if self._csv_file is not None:
+            self._csv_file.close()
+            self._csv_file = None
+            self._csv_writer = None
@@ -0,0 +1,86 @@
+import time
+from itertools import chain, islice
+
+import pygame
+
+
+class FixedTimestep:
+    # Runs game logic at a fixed number of ticks per second independently of
+    # how often the screen is redrawn. Call advance() once per rendered frame;
+    # it returns how many logic ticks are due, and alpha tells how far the
+    # render is between the last tick and the next one (0.0 - 1.0).
+    def __init__(self, ticks_per_second, max_ticks_per_frame=5):
+        self.tick_interval = 1.0 / ticks_per_second
+        self.max_ticks_per_frame = max_ticks_per_frame
+        self.accumulator = 0.0
+        self.last_time = time.perf_counter()
+
+    def reset(self):
+        # Forget any elapsed time, e.g. after a pause, so the snakes don't
+        # jump ahead by several ticks when the game resumes
+        self.accumulator = 0.0
+        self.last_time = time.perf_counter()
+
+    def advance(self):
+        now = time.perf_counter()
+        self.accumulator += now - self.last_time
+        self.last_time = now
+
+        ticks = int(self.accumulator / self.tick_interval)
+        if ticks > self.max_ticks_per_frame:
+            # Too far behind (stall, window drag...); drop the backlog
+            ticks = self.max_ticks_per_frame
+            self.accumulator = 0.0
+        else:
+            self.accumulator -= ticks * self.tick_interval
+        return ticks
+
+    @property
+    def alpha(self):
+        return min(self.accumulator / self.tick_interval, 1.0)
+
+
+def _blend(cell, prev, alpha, block_size, cols):
+    # Pixel position of a segment moving from cell prev to cell
+    row, col = divmod(cell, cols)
+    prev_row, prev_col = divmod(prev, cols)
+    dx = col - prev_col
+    dy = row - prev_row
+    if abs(dx) > 1 or abs(dy) > 1:
+        return (col * block_size, row * block_size)
+    return (int((prev_col + dx * alpha) * block_size),
+            int((prev_row + dy * alpha) * block_size))
+
+
+def interpolate_body(snake, alpha, block_size, cols):
+    # Pixel positions of a snake_engine.Snake's segments, blended between the
+    # previous tick and the current one. On the previous tick each segment was
+    # where the segment behind it is now, and the tail was on the cell it has
+    # just vacated. Segments that wrapped around the screen edge (moved more
+    # than one cell) are drawn at their new position instead of sliding across
+    # the board.
+    body = snake.body
+    if alpha >= 1.0:
+        return [((cell % cols) * block_size, (cell // cols) * block_size) for cell in body]
+    tail = snake.vacated if snake.vacated is not None else body[-1]
+    return [_blend(cell, prev, alpha, block_size, cols)
+            for cell, prev in zip(body, chain(islice(body, 1, None), (tail,)))]
+
+
+def interpolate_ends(snake, alpha, block_size, cols):
+    # Only the head's and the tail's positions from interpolate_body(), for
+    # drawing over a layer that already holds the rest of the body
+    body = snake.body
+    tail = snake.vacated if snake.vacated is not None else body[-1]
+    head_prev = body[1] if len(body) > 1 else tail
+    return _blend(body[0], head_prev, alpha, block_size, cols), _blend(body[-1], tail, alpha, block_size, cols)
+
+
+def wait_events(timeout_ms=0):
+    # For screens that only change in response to input: sleep until an
+    # event arrives (or timeout_ms passes, if given) instead of polling, then
+    # return all pending events
+    event = pygame.event.wait(timeout_ms)
+    events = [] if event.type == pygame.NOEVENT else [event]
+    events.extend(pygame.event.get())
+    return events
@@ -0,0 +1,251 @@
+# Frame sources for the camera background.
+#
+# Every source behaves like a cv2.VideoCapture: read() returns (ret, frame)
+# with a BGR uint8 frame, and release() closes it. Besides the live camera
+# there are sources that need no webcam at all: a looping video file, a
+# replay of an image sequence or NumPy frames, and a synthetic noise or
+# gradient generator, so the game's camera and render path can run headless
+# (benchmarks, CI) and reproducibly.
+#
+# Sources produce frames at width x height (None: the source's own size) and
+# hand them out at most `fps` times per second, sleeping in read() like a
+# camera would; fps=None delivers frames as fast as they are read. Returned
+# frames are never written to again, so they can be passed between threads.
+import glob
+import os
+import time
+
+import cv2
+import numpy as np
+
+# Common webcam capture modes, largest first
+CAPTURE_MODES = [
+    (1920, 1080),
+    (1280, 720),
+    (1024, 576),
+    (960, 540),
+    (800, 600),
+    (640, 480),
+    (320, 240),
+]
+
+# Uncompressed YUYV needs 2 bytes per pixel over USB. Above this rate the
+# camera tends to cut its frame rate, so MJPG (decoded on the CPU) is cheaper.
+YUYV_MAX_BYTES_PER_SECOND = 24 * 1024 * 1024
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+
+def fourcc_name(value):
+    value = int(value)
+    return ''.join(chr((value >> (8 * i)) & 0xFF) for i in range(4)).strip('\x00')
+
+
+def choose_capture_mode(width, height, max_upscale=1.25):
+    # Smallest mode that covers a width x height area (the camera is scaled
+    # to cover the game) with at most max_upscale enlargement, so we don't
+    # capture and downscale far more pixels than the game shows
+    for mode_width, mode_height in reversed(CAPTURE_MODES):
+        if max(width / mode_width, height / mode_height) <= max_upscale:
+            return mode_width, mode_height
+    return CAPTURE_MODES[0]
+
+
+def configure_capture(cap, width, height, fps=30, buffer_size=1):
+    # Ask the driver for a width x height capture mode instead of its
+    # defaults (often 1080p YUYV at a low frame rate). Returns the mode the
+    # driver actually negotiated.
+    if width * height * 2 * fps > YUYV_MAX_BYTES_PER_SECOND:
+        # The format has to be set before the size for V4L2 to accept it
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+    cap.set(cv2.CAP_PROP_FPS, fps)
+    # Keep as few frames as possible queued in the driver, so reads return
+    # the newest frame rather than a stale one
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, buffer_size)
+    return {
+        'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        'fps': cap.get(cv2.CAP_PROP_FPS),
+        'fourcc': fourcc_name(cap.get(cv2.CAP_PROP_FOURCC)),
+        'buffer_size': int(cap.get(cv2.CAP_PROP_BUFFERSIZE)),
+    }
+
+
+class FrameSource:
+    # Base class: subclasses implement _next_frame() and set self.mode
+    def __init__(self, width=None, height=None, fps=None):
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.mode = None
+        self._next_time = None
+
+    def isOpened(self):
+        return True
+
+    def _pace(self):
+        # Wait until the next frame is due
+        if not self.fps:
+            return
+        now = time.perf_counter()
+        if self._next_time is None or now > self._next_time:
+            # First frame, or the reader fell behind; don't catch up in a burst
+            self._next_time = now
+        else:
+            time.sleep(self._next_time - now)
+        self._next_time += 1.0 / self.fps
+
+    def _resize(self, frame):
+        if self.width is None or self.height is None or frame.shape[:2] == (self.height, self.width):
+            return frame
+        return cv2.resize(frame, (self.width, self.height), interpolation=cv2.INTER_LINEAR)
+
+    def read(self):
+        self._pace()
+        frame = self._next_frame()
+        if frame is None:
+            return False, None
+        return True, frame
+
+    def _next_frame(self):
+        raise NotImplementedError
+
+    def release(self):
+        pass
+
+
+class LiveCameraSource(FrameSource):
+    # A webcam. width x height and fps are requested from the driver (see
+    # configure_capture); the camera itself sets the pace.
+    def __init__(self, device=0, width=None, height=None, fps=30):
+        super().__init__(width, height, None)
+        self.cap = cv2.VideoCapture(device)
+        if width is not None and height is not None and self.cap.isOpened():
+            self.mode = configure_capture(self.cap, width, height, fps)
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self):
+        return self.cap.read()
+
+    def release(self):
+        self.cap.release()
+
+
+class VideoFileSource(FrameSource):
+    # A video file, played from the start again when it ends. Plays at the
+    # file's own frame rate unless fps is given.
+    def __init__(self, path, width=None, height=None, fps=None, loop=True):
+        self.cap = cv2.VideoCapture(path)
+        if fps is None:
+            fps = self.cap.get(cv2.CAP_PROP_FPS) or 30
+        super().__init__(width, height, fps)
+        self.loop = loop
+        self.mode = {'source': 'video', 'path': path, 'fps': fps}
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def _next_frame(self):
+        ret, frame = self.cap.read()
+        if not ret and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read()
+        return self._resize(frame) if ret else None
+
+    def release(self):
+        self.cap.release()
+
+
+class ReplaySource(FrameSource):
+    # Replays a sequence of frames: a list of BGR arrays or an (N, H, W, 3)
+    # array. Frames are resized once, up front.
+    def __init__(self, frames, width=None, height=None, fps=30, loop=True):
+        super().__init__(width, height, fps)
+        self.frames = [self._resize(np.ascontiguousarray(frame)) for frame in frames]
+        self.loop = loop
+        self.position = 0
+        self.mode = {'source': 'replay', 'frames': len(self.frames), 'fps': fps}
+
+    @classmethod
+    def from_images(cls, pattern, width=None, height=None, fps=30, loop=True):
+        # Image files matching a glob pattern, or all images in a folder, in
+        # name order
+        if os.path.isdir(pattern):
+            paths = [os.path.join(pattern, name) for name in sorted(os.listdir(pattern))
+                     if name.lower().endswith(IMAGE_EXTENSIONS)]
+        else:
+            paths = sorted(glob.glob(pattern))
+        return cls([cv2.imread(path) for path in paths], width, height, fps, loop)
+
+    @classmethod
+    def from_npy(cls, path, width=None, height=None, fps=30, loop=True):
+        return cls(np.load(path, mmap_mode='r'), width, height, fps, loop)
+
+    def isOpened(self):
+        return len(self.frames) > 0
+
+    def _next_frame(self):
+        if self.position >= len(self.frames):
+            if not self.loop or not self.frames:
+                return None
+            self.position = 0
+        frame = self.frames[self.position]
+        self.position += 1
+        return frame
+
+
+class SyntheticSource(FrameSource):
+    # Generated frames: 'noise' cycles through a fixed set of random frames
+    # (seeded, so runs are reproducible), 'gradient' is a colour gradient
+    # scrolling sideways. Both are precomputed, so reading costs next to
+    # nothing and timings measure the game rather than the generator.
+    def __init__(self, pattern='noise', width=640, height=480, fps=30, seed=0, noise_frames=8):
+        super().__init__(width, height, fps)
+        self.pattern = pattern
+        self.index = 0
+        if pattern == 'noise':
+            rng = np.random.default_rng(seed)
+            self.frames = [rng.integers(0, 256, (height, width, 3), dtype=np.uint8) for _ in range(noise_frames)]
+        elif pattern == 'gradient':
+            # Two periods side by side, so any window of `width` columns is a frame
+            x = np.arange(2 * width)
+            y = np.arange(height)[:, None]
+            self.strip = np.empty((height, 2 * width, 3), dtype=np.uint8)
+            self.strip[:, :, 0] = (x * 255 // max(1, width - 1)) % 256
+            self.strip[:, :, 1] = y * 255 // max(1, height - 1)
+            self.strip[:, :, 2] = 255 - self.strip[:, :, 0]
+        else:
+            raise ValueError(f"Unknown synthetic pattern '{pattern}'")
+        self.mode = {'source': 'synthetic', 'pattern': pattern, 'width': width, 'height': height, 'fps': fps}
+
+    def _next_frame(self):
+        self.index += 1
+        if self.pattern == 'noise':
+            return self.frames[self.index % len(self.frames)]
+        offset = (self.index * 8) % self.width
+        return self.strip[:, offset:offset + self.width]
+
+
+def open_frame_source(spec=0, width=None, height=None, fps=30):
+    # Frame source from a setting: a camera index (int or digits), a video
+    # file, a folder or glob of images, a .npy file of frames, or
+    # 'synthetic:noise' / 'synthetic:gradient'. Objects that already have a
+    # read() method are returned as they are.
+    if hasattr(spec, 'read'):
+        return spec
+    if isinstance(spec, str) and spec.isdigit():
+        spec = int(spec)
+    if isinstance(spec, int):
+        return LiveCameraSource(spec, width, height, fps)
+    if spec.startswith('synthetic'):
+        pattern = spec.partition(':')[2] or 'noise'
+        return SyntheticSource(pattern, width or 640, height or 480, fps)
+    if spec.endswith('.npy'):
+        return ReplaySource.from_npy(spec, width, height, fps)
+    if os.path.isdir(spec) or glob.has_magic(spec):
+        return ReplaySource.from_images(spec, width, height, fps)
+    return VideoFileSource(spec, width, height, fps)
@@ -0,0 +1,171 @@
+import hashlib
+import json
+import math
+import os
+import threading
+
+import pygame
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif')
+MANIFEST_NAME = 'manifest.json'
+DEFAULT_BODY_NAME = 'default-body.png'
+
+
+def file_digest(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class IconAssets:
+    # Snake body and food icons from an icons folder, scaled to block_size.
+    #
+    # Only the files listed in the folder's manifest.json are used:
+    #     {"default_body": "default-body.png", "food": ["apple.png", ...]}
+    # Without a manifest every image in the folder is used, as before
+    # ('default-body.png' for the body, the rest as food).
+    #
+    # Nothing is read until load() is called. Each icon is then scaled once
+    # and the result cached on disk (in .cache inside the folder) under the
+    # hash of the original file, so later runs don't decode the originals at
+    # all. The file hashes are remembered with each file's size and mtime and
+    # only recomputed when those change. All icons are packed into a single
+    # atlas surface, also cached on disk, and handed out as subsurfaces of it.
+    # load() may be called from a background thread; a second caller waits
+    # for the first one to finish.
+    def __init__(self, folder, block_size, cache_folder=None):
+        self.folder = folder
+        self.block_size = block_size
+        self.cache_folder = cache_folder or os.path.join(folder, '.cache')
+        self.loaded = False
+        self._lock = threading.Lock()
+        self.atlas = None
+        self.default_body = None
+        self.food = []
+
+    def manifest(self):
+        # (default body file name or None, food file names)
+        manifest_path = os.path.join(self.folder, MANIFEST_NAME)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding='utf-8') as f:
+                manifest = json.load(f)
+            return manifest.get('default_body'), list(manifest.get('food', []))
+        names = sorted(name for name in os.listdir(self.folder) if name.lower().endswith(IMAGE_EXTENSIONS))
+        default_body = DEFAULT_BODY_NAME if DEFAULT_BODY_NAME in names else None
+        return default_body, [name for name in names if name != DEFAULT_BODY_NAME]
+
+    def load(self):
+        with self._lock:
+            if not self.loaded:
+                self._load()
+                self.loaded = True
+
+    def _load(self):
+        if not os.path.exists(self.folder):
+            os.makedirs(self.folder)
+            print(f"Created '{self.folder}' folder. Please add icon images to this folder.")
+            default_body_name, food_names = None, []
+        else:
+            default_body_name, food_names = self.manifest()
+
+        names = ([default_body_name] if default_body_name else []) + food_names
+        index = self._read_index()
+        icons = {}
+        for name in names:
+            path = os.path.join(self.folder, name)
+            try:
+                digest = self._digest(index, name, path)
+                icons[name] = digest
+            except OSError as e:
+                print(f"Failed to load image '{name}': {e}")
+
+        atlas, slots = self._atlas([(name, digest) for name, digest in icons.items()])
+        self._write_index(index)
+        if atlas is not None:
+            self.atlas = atlas.convert_alpha()
+            icon_surfaces = {name: self.atlas.subsurface(rect) for name, rect in slots.items()}
+            self.default_body = icon_surfaces.get(default_body_name)
+            self.food = [icon_surfaces[name] for name in food_names if name in icon_surfaces]
+
+        if not self.default_body:
+            print(f"No '{DEFAULT_BODY_NAME}' found in '{self.folder}' folder. Using default color for snake body.")
+        if not self.food:
+            print(f"No food icons found in '{self.folder}' folder. Using default red square for food.")
+
+    def _digest(self, index, name, path):
+        # Content hash of an icon file, reused while its size and mtime match
+        stat = os.stat(path)
+        entry = index.get(name)
+        if entry is None or entry['size'] != stat.st_size or entry['mtime_ns'] != stat.st_mtime_ns:
+            entry = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha1': file_digest(path)}
+            index[name] = entry
+        return entry['sha1']
+
+    def _index_path(self):
+        return os.path.join(self.cache_folder, 'index.json')
+
+    def _read_index(self):
+        try:
+            with open(self._index_path()) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_index(self, index):
+        try:
+            os.makedirs(self.cache_folder, exist_ok=True)
+            with open(self._index_path(), 'w') as f:
+                json.dump(index, f, indent=1, sort_keys=True)
+        except OSError:
+            pass
+
+    def _save(self, surface, path):
+        # Caching is best effort; a read-only icons folder just means no cache
+        try:
+            os.makedirs(self.cache_folder, exist_ok=True)
+            pygame.image.save(surface, path)
+        except (OSError, pygame.error):
+            pass
+
+    def _scaled_icon(self, name, digest):
+        # Icon scaled to block_size, from the disk cache if it is there
+        size = self.block_size
+        cache_path = os.path.join(self.cache_folder, f"{digest}-{size}.png")
+        if os.path.exists(cache_path):
+            return pygame.image.load(cache_path)
+        try:
+            icon_image = pygame.image.load(os.path.join(self.folder, name))
+        except (OSError, pygame.error) as e:
+            print(f"Failed to load image '{name}': {e}")
+            return None
+        icon_image = pygame.transform.scale(icon_image.convert_alpha(), (size, size))
+        self._save(icon_image, cache_path)
+        return icon_image
+
+    def _atlas(self, icons):
+        # Atlas surface holding the (name, digest) icons in a grid, and each
+        # name's rect in it
+        if not icons:
+            return None, {}
+        size = self.block_size
+        columns = math.ceil(math.sqrt(len(icons)))
+        slots = {name: pygame.Rect((idx % columns) * size, (idx // columns) * size, size, size)
+                 for idx, (name, _) in enumerate(icons)}
+        key = hashlib.sha1(json.dumps([size] + [digest for _, digest in icons]).encode()).hexdigest()
+        atlas_path = os.path.join(self.cache_folder, f"atlas-{size}-{key[:16]}.png")
+        if os.path.exists(atlas_path):
+            return pygame.image.load(atlas_path), slots
+
+        rows = math.ceil(len(icons) / columns)
+        atlas = pygame.Surface((columns * size, rows * size), pygame.SRCALPHA)
+        for name, digest in icons:
+            icon_image = self._scaled_icon(name, digest)
+            if icon_image is None:
+                del slots[name]
+                continue
+            atlas.blit(icon_image, slots[name])
+        if len(slots) == len(icons):
+            self._save(atlas, atlas_path)
+        return atlas, slots
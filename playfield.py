@@ -0,0 +1,96 @@
+import pygame
+
+
+class Playfield:
+    # A persistent transparent layer with everything on the board that only
+    # changes when the game ticks: the snakes' bodies and the food. It is
+    # kept up to date cell by cell (after a tick the old head becomes body,
+    # the new tail's cell is cleared and the food moves), so a frame costs
+    # one composite of the layer over the background however long the
+    # snakes get; only the sliding heads and tails are drawn per frame.
+    #
+    # A cell holds an RGB colour (filled opaque), an image (copied alpha and
+    # all, so the layer composites exactly like drawing the image directly)
+    # or nothing. Cells are packed like snake_engine's (row * cols + col).
+    #
+    # The layer is made of per-pixel-alpha tiles of TILE_CELLS x TILE_CELLS
+    # cells, composited in one blits() call. Only tiles with something on
+    # them are drawn, and the tiles are RLE encoded, which makes blending
+    # them several times cheaper (transparent runs are skipped). Changing a
+    # cell re-encodes just its tile, on the next draw.
+    TILE_CELLS = 4
+
+    def __init__(self, width, height, block_size):
+        self.block_size = block_size
+        self.cols = width // block_size
+        self.size = (width, height)
+        tile_size = block_size * self.TILE_CELLS
+        self._tile_cols = -(-width // tile_size)
+        self._tiles = []
+        for y in range(0, height, tile_size):
+            for x in range(0, width, tile_size):
+                tile = pygame.Surface((min(tile_size, width - x), min(tile_size, height - y)), pygame.SRCALPHA)
+                tile.set_alpha(255, pygame.RLEACCEL)
+                self._tiles.append((tile, (x, y)))
+        self.clear()
+
+    def clear(self):
+        for tile, _ in self._tiles:
+            tile.fill((0, 0, 0, 0))
+        self.cells = {}
+        self.items = {}
+        self._tile_counts = [0] * len(self._tiles)  # Occupied cells per tile
+        self._blits = None  # The occupied tiles; rebuilt when that set changes
+        self.changed = [pygame.Rect((0, 0), self.size)]
+
+    def set(self, cell, content):
+        # Put content (an RGB colour or a Surface) on a cell, or empty it
+        # with None. Setting what the cell already holds does nothing.
+        old = self.cells.get(cell)
+        if old is content or (old is not None and old == content):
+            return
+        size = self.block_size
+        row, col = divmod(cell, self.cols)
+        index = (row // self.TILE_CELLS) * self._tile_cols + col // self.TILE_CELLS
+        tile = self._tiles[index][0]
+        rect = pygame.Rect(col % self.TILE_CELLS * size, row % self.TILE_CELLS * size, size, size)
+        tile.fill((0, 0, 0, 0), rect)
+
+        if content is None:
+            del self.cells[cell]
+            self._tile_counts[index] -= 1
+            if not self._tile_counts[index]:
+                self._blits = None
+        else:
+            if old is None:
+                self._tile_counts[index] += 1
+                if self._tile_counts[index] == 1:
+                    self._blits = None
+            self.cells[cell] = content
+            if isinstance(content, pygame.Surface):
+                # Adding onto the cleared (all zero) cell copies the image's
+                # pixels as they are, instead of blending them
+                tile.blit(content, rect, special_flags=pygame.BLEND_RGBA_ADD)
+            else:
+                tile.fill(content, rect)
+        self.changed.append(pygame.Rect(col * size, row * size, size, size))
+
+    def move(self, key, cell, content):
+        # Place a single item, such as the food, on cell (None: remove it),
+        # emptying the cell it was on before
+        old_cell = self.items.pop(key, None)
+        if old_cell is not None and old_cell != cell:
+            self.set(old_cell, None)
+        if cell is not None:
+            self.items[key] = cell
+            self.set(cell, content)
+
+    def draw(self, surface):
+        # Composite the layer onto surface. Returns the areas that changed
+        # since the last draw (for dirty-rect updates) and forgets them.
+        if self._blits is None:
+            self._blits = [tile for tile, count in zip(self._tiles, self._tile_counts) if count]
+        surface.blits(self._blits, False)
+        changed = self.changed
+        self.changed = []
+        return changed
@@ -0,0 +1,105 @@
+import time
+
+from camera_pipeline import QUALITY_FULL, QUALITY_HALF, QUALITY_GRAY
+
+# Background quality levels, best first
+LEVEL_FULL, LEVEL_HALF, LEVEL_GRAY, LEVEL_REUSE, LEVEL_STATIC = range(5)
+LEVEL_NAMES = ('full', 'half', 'gray', 'reuse', 'static')
+
+# Camera processing quality used at each level
+LEVEL_QUALITY = (QUALITY_FULL, QUALITY_HALF, QUALITY_GRAY, QUALITY_GRAY, QUALITY_GRAY)
+
+
+class QualityGovernor:
+    # Holds the render frame rate by lowering the camera background quality
+    # when frames take longer than the frame budget:
+    #   full resolution -> half resolution upscaled -> grayscale
+    #   -> new camera image only every reuse_interval frames -> static snapshot
+    #
+    # Call frame_started() when a frame begins and frame_finished() once it
+    # is drawn, before waiting for the next one. The time in between is
+    # smoothed, and after step_down_after frames over budget the governor
+    # steps one level down. It steps back up after step_up_after frames with
+    # the cost below headroom * budget. Every time a step up has to be undone
+    # straight away, the wait before the next try at that level doubles, so
+    # it doesn't keep bouncing between two levels.
+    #
+    # With fixed_level the governor stays at that level and never adapts.
+    def __init__(self, target_fps, reuse_interval=3, step_down_after=15, step_up_after=120,
+                 headroom=0.6, max_step_up_after=1920, smoothing=0.1, fixed_level=None):
+        self.budget_ms = 1000.0 / target_fps
+        self.reuse_interval = reuse_interval
+        self.step_down_after = step_down_after
+        self.step_up_after = step_up_after
+        self.max_step_up_after = max_step_up_after
+        self.headroom = headroom
+        self.smoothing = smoothing
+
+        self.fixed_level = fixed_level
+        self.level = LEVEL_FULL if fixed_level is None else fixed_level
+        self.frame_ms = None  # Smoothed frame cost
+        self.frames = 0
+        self._step_up_after = [step_up_after] * len(LEVEL_NAMES)
+        self._over = 0        # Consecutive frames over budget
+        self._under = 0       # Consecutive frames with headroom
+        self._level_frames = 0
+        self._stepped_up = False  # Whether the current level was reached by stepping up
+        self._frame_start = None
+
+    @property
+    def quality(self):
+        # Processing quality for the camera image
+        return LEVEL_QUALITY[self.level]
+
+    def refresh_background(self):
+        # Whether to process a new camera image this frame
+        if self.level == LEVEL_STATIC:
+            return False
+        if self.level == LEVEL_REUSE:
+            return self.frames % self.reuse_interval == 0
+        return True
+
+    def frame_started(self):
+        self._frame_start = time.perf_counter()
+
+    def frame_finished(self):
+        if self._frame_start is None:
+            return
+        cost_ms = (time.perf_counter() - self._frame_start) * 1000.0
+        self._frame_start = None
+        self.frames += 1  # Counted at a fixed level too, for refresh_background()
+        if self.fixed_level is not None:
+            return
+        self._level_frames += 1
+        if self.frame_ms is None:
+            self.frame_ms = cost_ms
+        else:
+            self.frame_ms += self.smoothing * (cost_ms - self.frame_ms)
+
+        if self.frame_ms > self.budget_ms:
+            self._over += 1
+            self._under = 0
+            if self._over >= self.step_down_after and self.level < LEVEL_STATIC:
+                if self._stepped_up and self._level_frames < self.step_up_after:
+                    # We only just got here and it is already too slow
+                    self._step_up_after[self.level] = min(self._step_up_after[self.level] * 2,
+                                                          self.max_step_up_after)
+                self._set_level(self.level + 1)
+        elif self.frame_ms < self.budget_ms * self.headroom:
+            self._under += 1
+            self._over = 0
+            if self.level > LEVEL_FULL and self._under >= self._step_up_after[self.level - 1]:
+                self._set_level(self.level - 1)
+        else:
+            self._over = 0
+            self._under = 0
+
+    def _set_level(self, level):
+        self._stepped_up = level < self.level
+        self.level = level
+        self._over = 0
+        self._under = 0
+        self._level_frames = 0
+        # Forget the cost measured at the old level
+        self.frame_ms = None
+        print(f"Background quality: {LEVEL_NAMES[level]}")
@@ -0,0 +1,62 @@
+from collections import OrderedDict
+
+import pygame
+
+
+def surface_bytes(surface):
+    return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+
+class RenderCache:
+    # Keeps rendered text and precomposed overlay surfaces between frames so
+    # static screen content is only drawn once. Least recently used entries
+    # are dropped once the cached surfaces together take more than max_bytes.
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._fonts = {}
+
+    def font(self, name, size):
+        key = (name, size)
+        font = self._fonts.get(key)
+        if font is None:
+            font = pygame.font.SysFont(name, size)
+            self._fonts[key] = font
+        return font
+
+    def get(self, key, build):
+        # Cached surface for `key`, calling build() to create it on a miss
+        surface = self._entries.get(key)
+        if surface is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = build()
+        self._entries[key] = surface
+        self.total_bytes += surface_bytes(surface)
+        # Evict the oldest entries, but always keep the one just added
+        while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self.total_bytes -= surface_bytes(evicted)
+        return surface
+
+    def text(self, font_name, font_size, text, color):
+        return self.get(('text', font_name, font_size, text, color),
+                        lambda: self.font(font_name, font_size).render(text, True, color))
+
+    def overlay(self, key, size, draw):
+        # Transparent surface of `size`, drawn once by draw(surface)
+        def build():
+            surface = pygame.Surface(size, pygame.SRCALPHA)
+            draw(surface)
+            return surface
+        return self.get(('overlay', key, tuple(size)), build)
+
+    def clear(self):
+        self._entries.clear()
+        self.total_bytes = 0
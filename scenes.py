@@ -0,0 +1,123 @@
+import pygame
+
+from frame_scheduler import FixedTimestep, wait_events
+
+
+class Scene:
+    # One screen of the game (menu, countdown, the game itself...), run by a
+    # SceneStack. A scene declares how it wants to be run:
+    #   tick_rate   tick() calls per second for its fixed-rate logic, or None
+    #   render_fps  frame rate cap for render(), or None to render once when
+    #               the scene comes up and then only after events have arrived
+    #               (and not tick at all in the meantime)
+    # Both are read every frame, so a scene can change them as it goes, e.g.
+    # a paused game waits for events. self.stack is set when the scene is
+    # pushed, for switching to other scenes.
+    tick_rate = None
+    render_fps = 30
+
+    def __init__(self):
+        self.stack = None
+
+    def begin_frame(self):
+        # Called every frame just before the events are handled; for a scene
+        # that waits for events, once the wait is over, so a frame's duration
+        # never includes the time spent waiting
+        pass
+
+    def handle_event(self, event):
+        pass
+
+    def tick(self):
+        pass
+
+    def render(self, alpha):
+        # Draw a frame; alpha is how far it is between the last tick and the
+        # next one (0.0 - 1.0), 1.0 for scenes without ticks
+        pass
+
+
+class SceneStack:
+    # The main loop: runs the scene on top of the stack until the stack is
+    # empty. Every frame the events go to the top scene's handle_event(),
+    # after on_event(event) has seen them (for events that every screen
+    # handles the same way; it returns True when it dealt with one), then
+    # the logic ticks that are due run and the scene renders. Tick timing
+    # (a frame_scheduler.FixedTimestep) and the frame rate limit are shared
+    # by all scenes and follow the top scene's tick_rate and render_fps.
+    #
+    # A scene switches screens with push() (the new scene goes on top and
+    # this one resumes when it is popped), replace() or pop().
+    def __init__(self, clock=None, on_event=None):
+        self.clock = clock or pygame.time.Clock()
+        self.on_event = on_event
+        self.scenes = []
+        self._active = None
+        self._tick_rate = None
+        self._scheduler = None
+
+    @property
+    def top(self):
+        return self.scenes[-1] if self.scenes else None
+
+    def push(self, scene):
+        scene.stack = self
+        self.scenes.append(scene)
+        return scene
+
+    def pop(self):
+        return self.scenes.pop()
+
+    def replace(self, scene):
+        self.scenes.pop()
+        return self.push(scene)
+
+    def run(self):
+        while self.scenes:
+            self.frame()
+
+    def _activate(self, scene):
+        # A different scene is on top, or it changed its tick rate: time its
+        # ticks from now
+        self._active = scene
+        self._tick_rate = scene.tick_rate
+        self._scheduler = FixedTimestep(scene.tick_rate) if scene.tick_rate else None
+
+    def frame(self):
+        scene = self.scenes[-1]
+        activated = scene is not self._active or scene.tick_rate != self._tick_rate
+        if activated:
+            self._activate(scene)
+
+        waiting = not scene.render_fps
+        if waiting and activated:
+            # A scene that only renders after events is drawn once as soon as
+            # it comes up, instead of the last screen staying up until input
+            scene.render(1.0)
+        events = wait_events() if waiting else pygame.event.get()
+        scene.begin_frame()
+        for event in events:
+            if self.on_event is not None and self.on_event(event):
+                continue
+            if self.scenes:
+                self.scenes[-1].handle_event(event)
+        if self.top is not scene:
+            return
+
+        alpha = 1.0
+        if self._scheduler is not None:
+            if waiting:
+                # Nothing runs while waiting for events; that includes the
+                # frame whose events end the wait (e.g. un-pausing), which
+                # must not catch up on the time spent waiting
+                self._scheduler.reset()
+            else:
+                for _ in range(self._scheduler.advance()):
+                    scene.tick()
+                    if self.top is not scene:
+                        return
+            alpha = self._scheduler.alpha
+
+        scene.render(alpha)
+        if scene.render_fps:
+            self.clock.tick(scene.render_fps)
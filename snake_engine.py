@@ -0,0 +1,250 @@
+# Headless snake game engine.
+#
+# Holds all game rules from the original game_loop (movement with wrap-around,
+# growing on food, food respawn, self/body/head-on collisions) without any
+# pygame or camera code, so games can be simulated and benchmarked without a
+# display or a webcam. Positions are packed grid cells (row * cols + col), not
+# pixels; use cell_position() to unpack them and multiply by BLOCK_SIZE when
+# drawing.
+#
+# Bodies are deques of cells with the head on the left, so moving is an O(1)
+# push of the new head and pop of the tail. Each snake also carries `tags`, one
+# value per segment counted from the head (snake_game2 keeps the segment icons
+# there); a snake that eats grows a new tail segment tagged with
+# `state.food_tag`.
+#
+# Each snake also has an occupancy grid (one byte per cell counting the body
+# segments on it), plus a combined grid for all snakes. Both are updated
+# incrementally as heads are added and tails removed, so collision and
+# free-cell checks don't scan the bodies.
+#
+# Free cells are kept in a list with a cell -> list position index, so a cell
+# can be removed (swapped with the last entry) or added back in O(1) and food
+# spawns in constant time however full the board is. When no free cell is left
+# for new food the board is full and the game ends.
+#
+# step(state, actions) only touches `state`. Food placement uses a
+# counter-based random generator seeded per game, so the same seed and the
+# same actions always produce the same game.
+import random
+from collections import deque
+
+UP, DOWN, LEFT, RIGHT = 'UP', 'DOWN', 'LEFT', 'RIGHT'
+
+DIRECTION_DELTAS = {
+    UP: (0, -1),
+    DOWN: (0, 1),
+    LEFT: (-1, 0),
+    RIGHT: (1, 0),
+}
+
+OPPOSITE = {UP: DOWN, DOWN: UP, LEFT: RIGHT, RIGHT: LEFT}
+
+START_LENGTH = 3
+
+_MASK64 = (1 << 64) - 1
+
+
+def random_u64(seed, counter):
+    # SplitMix64 of (seed, counter). Stateless, so the n-th food spawn of a
+    # game is fully determined by its seed; batch_engine uses the same mixer.
+    z = (seed + (counter + 1) * 0x9E3779B97F4A7C15) & _MASK64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return z ^ (z >> 31)
+
+
+def cell_position(state, cell):
+    # Packed cell -> (col, row)
+    return cell % state.cols, cell // state.cols
+
+
+class Snake:
+    def __init__(self, body, direction, tags=None):
+        self.body = deque(body)     # Packed cells, head first
+        self.direction = direction
+        self.tags = list(tags) if tags is not None else [None] * len(self.body)
+        self.vacated = None         # Tail cell given up on the last move (None if it grew)
+
+    @property
+    def head(self):
+        return self.body[0]
+
+    def copy(self):
+        snake = Snake(self.body, self.direction, self.tags)
+        snake.vacated = self.vacated
+        return snake
+
+
+class GameState:
+    def __init__(self, cols, rows, snakes, food, seed):
+        self.cols = cols
+        self.rows = rows
+        self.snakes = snakes
+        self.food = food            # Packed cell, or None when the board is full
+        self.food_tag = None        # Tag given to the segment grown from eating the food
+        self.seed = seed
+        self.spawn_count = 0        # Number of food spawns so far (random counter)
+        self.tick = 0
+        self.game_over = False
+        self.winner = None          # Index of the winning snake, None for a draw / single player
+        self.ate = [False] * len(snakes)  # Which snakes ate on the last tick
+        self.food_spawned = False   # Whether new food was placed on the last tick
+        self.board_full = False     # No free cell was left for new food
+
+        # Per-snake and combined occupancy grids indexed by row * cols + col
+        self.occupancy = []
+        self.occupied = bytearray(cols * rows)
+        for snake in snakes:
+            grid = bytearray(cols * rows)
+            for cell in snake.body:
+                grid[cell] += 1
+                self.occupied[cell] += 1
+            self.occupancy.append(grid)
+
+        # Free cells in swap-remove order, and each cell's position in that list (-1 if occupied)
+        self.free_cells = [cell for cell in range(cols * rows) if not self.occupied[cell]]
+        self.free_index = [-1] * (cols * rows)
+        for idx, cell in enumerate(self.free_cells):
+            self.free_index[cell] = idx
+
+    @property
+    def single_player(self):
+        return len(self.snakes) == 1
+
+    def is_free(self, cell):
+        return not self.occupied[cell]
+
+    def copy(self):
+        state = GameState(self.cols, self.rows, [snake.copy() for snake in self.snakes], self.food, self.seed)
+        state.food_tag = self.food_tag
+        state.spawn_count = self.spawn_count
+        state.tick = self.tick
+        state.game_over = self.game_over
+        state.winner = self.winner
+        state.ate = list(self.ate)
+        state.food_spawned = self.food_spawned
+        state.board_full = self.board_full
+        # The free list order decides where food spawns, so keep it as is
+        state.free_cells = list(self.free_cells)
+        state.free_index = list(self.free_index)
+        return state
+
+
+def initial_snakes(cols, rows, single_player=True):
+    # Same starting layout as the original game_loop: snake 1 near the top-left
+    # heading right, snake 2 near the bottom-right heading left
+    snakes = [Snake([5 * cols + 5 - i for i in range(START_LENGTH)], RIGHT)]
+    if not single_player:
+        snakes.append(Snake([(rows - 5) * cols + cols - 5 + i for i in range(START_LENGTH)], LEFT))
+    return snakes
+
+
+def new_game(cols, rows, single_player=True, seed=None):
+    if seed is None:
+        seed = random.getrandbits(64)
+    state = GameState(cols, rows, initial_snakes(cols, rows, single_player), None, seed & _MASK64)
+    spawn_food(state)
+    state.food_spawned = False
+    return state
+
+
+def spawn_food(state):
+    # Pick a free cell using the game's random stream. Leaves food as None and
+    # flags the board as full when no cell is free.
+    free_cells = state.free_cells
+    if not free_cells:
+        state.food = None
+        state.board_full = True
+        return
+    k = random_u64(state.seed, state.spawn_count) % len(free_cells)
+    state.spawn_count += 1
+    state.food = free_cells[k]
+    state.food_spawned = True
+
+
+def _occupy(state, cell):
+    state.occupied[cell] += 1
+    if state.occupied[cell] == 1:
+        # Swap-remove the cell from the free list
+        free_cells = state.free_cells
+        last = free_cells.pop()
+        if last != cell:
+            idx = state.free_index[cell]
+            free_cells[idx] = last
+            state.free_index[last] = idx
+        state.free_index[cell] = -1
+
+
+def _vacate(state, cell):
+    state.occupied[cell] -= 1
+    if state.occupied[cell] == 0:
+        state.free_index[cell] = len(state.free_cells)
+        state.free_cells.append(cell)
+
+
+def _move(state, snake, grid, action):
+    # Ignore requests to reverse into the snake's own neck
+    if action is not None and action != OPPOSITE[snake.direction]:
+        snake.direction = action
+    dx, dy = DIRECTION_DELTAS[snake.direction]
+    cols = state.cols
+    row, col = divmod(snake.body[0], cols)
+    head = ((row + dy) % state.rows) * cols + (col + dx) % cols
+    snake.body.appendleft(head)
+    grid[head] += 1
+    _occupy(state, head)
+    if head == state.food:
+        snake.tags.append(state.food_tag)
+        snake.vacated = None
+        return True
+    tail = snake.body.pop()
+    grid[tail] -= 1
+    _vacate(state, tail)
+    snake.vacated = tail
+    return False
+
+
+def step(state, actions):
+    # Advance the game by one tick. `actions` holds the requested direction per
+    # snake (or None to keep going straight). Returns the same state.
+    if state.game_over:
+        return state
+
+    state.ate = [_move(state, snake, grid, action)
+                 for snake, grid, action in zip(state.snakes, state.occupancy, actions)]
+    state.food_spawned = False
+    if any(state.ate):
+        spawn_food(state)
+    state.tick += 1
+
+    # Game over conditions, in the same order as the original game_loop.
+    # A head cell counted twice in its own grid means it ran into its body;
+    # in the other snake's grid the other head must be discounted.
+    grid1 = state.occupancy[0]
+    cell1 = state.snakes[0].body[0]
+    if grid1[cell1] >= 2:
+        # Player 1 collided with itself; player 2 wins
+        state.game_over = True
+        state.winner = None if state.single_player else 1
+    elif not state.single_player:
+        grid2 = state.occupancy[1]
+        cell2 = state.snakes[1].body[0]
+        head_on = cell1 == cell2
+        if grid2[cell2] >= 2:
+            # Player 2 collided with itself; player 1 wins
+            state.game_over, state.winner = True, 0
+        elif grid2[cell1] - head_on > 0:
+            # Player 1 hit player 2's body; player 2 wins
+            state.game_over, state.winner = True, 1
+        elif grid1[cell2] - head_on > 0:
+            # Player 2 hit player 1's body; player 1 wins
+            state.game_over, state.winner = True, 0
+        elif head_on:
+            # Head-on collision is a draw
+            state.game_over, state.winner = True, None
+
+    if state.board_full and not state.game_over:
+        # Nowhere left to put food
+        state.game_over, state.winner = True, None
+    return state
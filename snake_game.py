@@ -1,28 +1,63 @@
 import pygame
 import cv2
-import numpy as np
 import sys
-import time
-
-# Initialize Pygame and OpenCV
-pygame.init()
-pygame.display.set_caption("Snake Game with Camera Background")
+import os
+from itertools import islice
+
+from camera_capture import CameraCapture
+from camera_worker import CameraWorker
+from frame_sources import choose_capture_mode
+from frame_scheduler import interpolate_body, interpolate_ends
+import snake_engine
+from render_cache import RenderCache
+from sprite_batch import SpriteBatch
+from playfield import Playfield
+from camera_pipeline import CameraFrameProcessor, QUALITY_FULL
+from display_output import DisplayOutput
+from quality_governor import QualityGovernor
+from frame_profiler import FrameProfiler
+from startup import Startup
+from scenes import Scene, SceneStack
 
 # Original game dimensions (aspect ratio)
 GAME_WIDTH, GAME_HEIGHT = 1200, 800  # You can change these values
 
-# Initialize camera
-cap = cv2.VideoCapture(0)  # Use 0 for the default camera
+# Camera background source: a camera index (0 for the default camera), a
+# video file, a folder or glob of images, a .npy file of frames, or
+# 'synthetic:noise' / 'synthetic:gradient'. SNAKE_CAMERA_SOURCE overrides it.
+CAMERA_SOURCE = os.environ.get('SNAKE_CAMERA_SOURCE', '0')
+
+# Capture at the smallest common camera mode that covers the game area
+CAMERA_WIDTH, CAMERA_HEIGHT = choose_capture_mode(GAME_WIDTH, GAME_HEIGHT)
+
+# Capture and process the camera in a separate worker process, which hands
+# the finished background over through shared memory, so that work doesn't
+# hold up rendering on slow CPUs. SNAKE_CAMERA_WORKER=1 turns it on.
+CAMERA_WORKER_PROCESS = os.environ.get('SNAKE_CAMERA_WORKER') == '1'
 
-# Variables to manage screen modes
-is_fullscreen = False
+# Camera read on a background capture thread (or by the worker); opened by start()
+if CAMERA_WORKER_PROCESS:
+    camera = CameraWorker(CAMERA_SOURCE, CAMERA_WIDTH, CAMERA_HEIGHT, GAME_WIDTH, GAME_HEIGHT)
+else:
+    camera = CameraCapture(CAMERA_SOURCE, CAMERA_WIDTH, CAMERA_HEIGHT)
+CAMERA_STARTUP_TIMEOUT = 10.0  # Seconds to wait for the first camera frame before reporting a failure
 
-# Create the window in windowed mode initially
-window = pygame.display.set_mode((GAME_WIDTH, GAME_HEIGHT))
+# Smooth (bilinear) or fast nearest-neighbour scaling when the game is scaled
+SMOOTH_SCALING = True
+RESIZABLE_WINDOW = True  # The window can be resized; the game is scaled to fit
+SDL_SCALED_OUTPUT = False  # Let SDL scale the game-sized window on the GPU (pygame SCALED mode)
+
+# Window and fullscreen output; the window is opened by start()
+display = DisplayOutput(GAME_WIDTH, GAME_HEIGHT, "Snake Game with Camera Background",
+                        SMOOTH_SCALING, RESIZABLE_WINDOW, SDL_SCALED_OUTPUT)
 
 # Game settings
 clock = pygame.time.Clock()
-speed = 5
+render_cache = RenderCache()  # Rendered text and static screen overlays
+speed = 5  # Game logic ticks per second
+RENDER_FPS = 60  # Camera background and HUD redraw rate
+MENU_FPS = 30  # Redraw rate of the menu and face capture screens (the camera delivers 30 fps)
+BACKGROUND_QUALITY = None  # None: adapt to hold RENDER_FPS; a quality_governor LEVEL_* keeps it fixed
 
 # Colors
 WHITE = (255, 255, 255)
@@ -30,190 +65,260 @@ RED = (255, 0, 0)
 YELLOW = (255, 255, 0)
 BLACK = (0, 0, 0)  # For background padding
 
-# Adjustable block size for snake and food
-BLOCK_SIZE = 40  # Adjust this value to change the size
-
-def toggle_fullscreen():
-    global is_fullscreen, window
-    is_fullscreen = not is_fullscreen
-    if is_fullscreen:
-        pygame.display.quit()
-        pygame.display.init()
-        infoObject = pygame.display.Info()
-        SCREEN_WIDTH, SCREEN_HEIGHT = infoObject.current_w, infoObject.current_h
-        window = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.FULLSCREEN)
-    else:
-        pygame.display.quit()
-        pygame.display.init()
-        window = pygame.display.set_mode((GAME_WIDTH, GAME_HEIGHT))
-    pygame.display.set_caption("Snake Game with Camera Background")
-
-def main_menu():
-    menu_font = pygame.font.SysFont('Arial', 50)
-    info_font = pygame.font.SysFont('Arial', 30)
-    run = True
-    while run:
-        # Create a game surface with the original game dimensions
-        game_surface = pygame.Surface((GAME_WIDTH, GAME_HEIGHT))
+# Draw the live camera behind the snakes; with a plain black background the
+# game only needs to push the areas that changed to the display
+CAMERA_BACKGROUND = True
+DIRTY_RECT_UPDATES = True
 
-        # Capture camera frame
-        ret, frame = cap.read()
-        if not ret:
-            continue
-
-        # Process camera frame
-        frame_surface, _, _, _, _ = process_camera_frame(frame)
-
-        # Display frame on the game surface
-        game_surface.blit(frame_surface, (0, 0))
-
-        # Render menu text
-        title_text = menu_font.render("Snake Game", True, WHITE)
-        single_text = menu_font.render("1. Single Player", True, WHITE)
-        double_text = menu_font.render("2. Double Player", True, WHITE)
-        instructions1 = info_font.render("Player 1: Arrow keys", True, WHITE)
-        instructions2 = info_font.render("Player 2: W/A/S/D keys", True, WHITE)
-        pause_text = info_font.render("Press SPACE to pause during game", True, WHITE)
-        size_text = info_font.render(f"Current Block Size: {BLOCK_SIZE}", True, WHITE)
-        fullscreen_text = info_font.render("Press 'f' to toggle Full Screen", True, WHITE)
-        quit_text = info_font.render("Press 'q' to Quit", True, WHITE)
-
-        # Blit text onto the game surface
-        game_surface.blit(title_text, (GAME_WIDTH//2 - title_text.get_width()//2, GAME_HEIGHT//6))
-        game_surface.blit(single_text, (GAME_WIDTH//2 - single_text.get_width()//2, GAME_HEIGHT//3))
-        game_surface.blit(double_text, (GAME_WIDTH//2 - double_text.get_width()//2, GAME_HEIGHT//3 + 60))
-        game_surface.blit(instructions1, (GAME_WIDTH//2 - instructions1.get_width()//2, GAME_HEIGHT//2 + 60))
-        game_surface.blit(instructions2, (GAME_WIDTH//2 - instructions2.get_width()//2, GAME_HEIGHT//2 + 100))
-        game_surface.blit(pause_text, (GAME_WIDTH//2 - pause_text.get_width()//2, GAME_HEIGHT//2 + 140))
-        game_surface.blit(size_text, (GAME_WIDTH//2 - size_text.get_width()//2, GAME_HEIGHT//2 + 180))
-        game_surface.blit(fullscreen_text, (GAME_WIDTH//2 - fullscreen_text.get_width()//2, GAME_HEIGHT//2 + 220))
-        game_surface.blit(quit_text, (GAME_WIDTH//2 - quit_text.get_width()//2, GAME_HEIGHT//2 + 260))
+# When the game is scaled, render the camera straight at screen resolution
+# and scale only the snakes and food up to it, drawn on a transparent overlay.
+# Not used with CAMERA_WORKER_PROCESS, whose frames are already game-sized.
+NATIVE_CAMERA_BACKGROUND = False
 
-        # Scale and center the game surface onto the window
-        scale_and_center(game_surface)
-
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                cap.release()
-                cv2.destroyAllWindows()
-                sys.exit()
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_1:
-                    player1_face_small, player1_face_large = capture_player_face(1)
-                    game_loop(single_player=True, snake1_head_image=player1_face_small)
-                elif event.key == pygame.K_2:
-                    player1_face_small, player1_face_large = capture_player_face(1)
-                    player2_face_small, player2_face_large = capture_player_face(2)
-                    game_loop(single_player=False,
-                              snake1_head_image=player1_face_small,
-                              snake2_head_image=player2_face_small,
-                              player1_face_large=player1_face_large,
-                              player2_face_large=player2_face_large)
-                elif event.key == pygame.K_f:
-                    toggle_fullscreen()
-                elif event.key == pygame.K_ESCAPE:
-                    if is_fullscreen:
-                        toggle_fullscreen()
-                elif event.key == pygame.K_q:
-                    pygame.quit()
-                    cap.release()
-                    cv2.destroyAllWindows()
-                    sys.exit()
-
-def capture_player_face(player_number):
-    font = pygame.font.SysFont('Arial', 40)
-    capturing = True
-    while capturing:
-        # Create a game surface with the original game dimensions
-        game_surface = pygame.Surface((GAME_WIDTH, GAME_HEIGHT))
+# Reusable buffers for turning camera frames into the game background; the
+# worker's frames already are the background, its processor only wraps them
+camera_processor = camera.processor if CAMERA_WORKER_PROCESS else CameraFrameProcessor(GAME_WIDTH, GAME_HEIGHT)
+output_camera_processor = CameraFrameProcessor(GAME_WIDTH, GAME_HEIGHT)  # Resized to the screen on use
 
-        # Capture camera frame
-        ret, frame = cap.read()
-        if not ret:
-            continue
+# Per-stage frame timings: F3 shows their p50 / p95 / p99 during a game, and
+# PROFILE_CSV names a file to write every frame's timings to
+PROFILE_STAGES = False
+PROFILE_CSV = None
+profiler = FrameProfiler(PROFILE_STAGES, csv_path=PROFILE_CSV)
+display.profiler = profiler
 
-        # Process camera frame
-        frame_surface, x_offset, y_offset, scale_factor, resized_frame = process_camera_frame(frame)
+# Adjustable block size for snake and food
+BLOCK_SIZE = 40  # Adjust this value to change the size
+sprite_batch = SpriteBatch(BLOCK_SIZE)  # Snake segments and food drawn each frame
+
+# Set by start(); times the startup and runs its slow parts in the background
+startup = None
+
+def open_camera():
+    # Open the camera and wait for its first frame
+    if not camera.start().wait_for_frame(CAMERA_STARTUP_TIMEOUT):
+        raise RuntimeError(f"no camera frame after {CAMERA_STARTUP_TIMEOUT:.0f} s")
+
+def start():
+    # Open the window straight away; the camera is opened in the background
+    # while the menu is already shown. Importing this module doesn't
+    # initialize pygame or open anything, this does.
+    global startup
+    if startup is None:
+        startup = Startup()
+        pygame.init()
+        startup.background('camera', open_camera)
+        display.open()
+    return startup
+
+def draw_main_menu_overlay(overlay):
+    # Render menu text
+    title_text = render_cache.text('Arial', 50, "Snake Game", WHITE)
+    overlay.blit(title_text, (GAME_WIDTH//2 - title_text.get_width()//2, GAME_HEIGHT//6))
+    single_text = render_cache.text('Arial', 50, "1. Single Player", WHITE)
+    overlay.blit(single_text, (GAME_WIDTH//2 - single_text.get_width()//2, GAME_HEIGHT//3))
+    double_text = render_cache.text('Arial', 50, "2. Double Player", WHITE)
+    overlay.blit(double_text, (GAME_WIDTH//2 - double_text.get_width()//2, GAME_HEIGHT//3 + 60))
+    instructions1 = render_cache.text('Arial', 30, "Player 1: Arrow keys", WHITE)
+    overlay.blit(instructions1, (GAME_WIDTH//2 - instructions1.get_width()//2, GAME_HEIGHT//2 + 60))
+    instructions2 = render_cache.text('Arial', 30, "Player 2: W/A/S/D keys", WHITE)
+    overlay.blit(instructions2, (GAME_WIDTH//2 - instructions2.get_width()//2, GAME_HEIGHT//2 + 100))
+    pause_text = render_cache.text('Arial', 30, "Press SPACE to pause during game", WHITE)
+    overlay.blit(pause_text, (GAME_WIDTH//2 - pause_text.get_width()//2, GAME_HEIGHT//2 + 140))
+    size_text = render_cache.text('Arial', 30, f"Current Block Size: {BLOCK_SIZE}", WHITE)
+    overlay.blit(size_text, (GAME_WIDTH//2 - size_text.get_width()//2, GAME_HEIGHT//2 + 180))
+    fullscreen_text = render_cache.text('Arial', 30, "Press 'f' to toggle Full Screen", WHITE)
+    overlay.blit(fullscreen_text, (GAME_WIDTH//2 - fullscreen_text.get_width()//2, GAME_HEIGHT//2 + 220))
+    quit_text = render_cache.text('Arial', 30, "Press 'q' to Quit", WHITE)
+    overlay.blit(quit_text, (GAME_WIDTH//2 - quit_text.get_width()//2, GAME_HEIGHT//2 + 260))
+
+def quit_game():
+    pygame.quit()
+    camera.release()
+    cv2.destroyAllWindows()
+    sys.exit()
+
+def handle_common_event(event):
+    # Quitting, window resizes and the fullscreen keys work the same on every
+    # screen; returns True when the event was one of those
+    if event.type == pygame.QUIT:
+        quit_game()
+    elif event.type == pygame.VIDEORESIZE:
+        display.handle_resize()
+        return True
+    elif event.type == pygame.KEYDOWN:
+        if event.key == pygame.K_f:
+            display.toggle_fullscreen()
+            return True
+        elif event.key == pygame.K_ESCAPE:
+            if display.is_fullscreen:
+                display.toggle_fullscreen()
+            return True
+        elif event.key == pygame.K_q:
+            quit_game()
+    return False
+
+def draw_camera_background(game_surface):
+    # Draw the camera image on the game surface, or black until the camera
+    # is up; returns what process_camera_frame did, or None without an image
+    ret, frame = camera.read()
+    if not ret:
+        game_surface.fill(BLACK)
+        return None
+    processed = process_camera_frame(frame)
+    game_surface.blit(processed[0], (0, 0))
+    return processed
+
+def draw_main_menu(game_surface):
+    # Camera background; until the camera is up the menu is shown on black
+    draw_camera_background(game_surface)
+
+    # Blit the menu text, composed once into a cached overlay
+    game_surface.blit(render_cache.overlay('main_menu', (GAME_WIDTH, GAME_HEIGHT), draw_main_menu_overlay), (0, 0))
+
+    # Scale and center the game surface onto the window
+    scale_and_center(game_surface)
+    startup.mark('first_frame')
+
+def run(scene):
+    # The main loop: runs the scene, and the scenes it switches to, until
+    # the last one is done
+    start()
+    stack = SceneStack(clock, handle_common_event)
+    stack.push(scene)
+    stack.run()
 
-        # Display frame on the game surface
-        game_surface.blit(frame_surface, (0, 0))
+def main_menu():
+    run(MainMenuScene())
+
+class MainMenuScene(Scene):
+    # Camera background with the menu on top; 1 or 2 starts a game
+    render_fps = MENU_FPS
+
+    def __init__(self):
+        super().__init__()
+        # Game surface with the original game dimensions, reused every frame
+        self.game_surface = pygame.Surface((GAME_WIDTH, GAME_HEIGHT))
+
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_1:
+                self.stack.push(FaceCaptureScene(1, players=1))
+            elif event.key == pygame.K_2:
+                self.stack.push(FaceCaptureScene(1, players=2))
+
+    def render(self, alpha):
+        draw_main_menu(self.game_surface)
+
+class FaceCaptureScene(Scene):
+    # Player `player_number` lines their face up in the square and presses
+    # Enter. faces holds the (small, large) face images of the players before
+    # them; once all `players` faces are in, the countdown starts.
+    render_fps = MENU_FPS
+
+    def __init__(self, player_number, players, faces=()):
+        super().__init__()
+        self.player_number = player_number
+        self.players = players
+        self.faces = list(faces)
 
         # Draw the square block in the center
         square_size = min(GAME_WIDTH, GAME_HEIGHT) // 1.5
-        square_rect = pygame.Rect(
+        self.square_rect = pygame.Rect(
             (GAME_WIDTH - square_size) // 2,
             (GAME_HEIGHT - square_size) // 2,
             square_size,
             square_size
         )
-        pygame.draw.rect(game_surface, RED, square_rect, 2)  # Draw the square border
+
+        # Game surface with the original game dimensions, reused every frame
+        self.game_surface = pygame.Surface((GAME_WIDTH, GAME_HEIGHT))
+        # Offsets and pixels of the camera image on screen; None until the camera is up
+        self.camera_image = None
+
+    def draw_overlay(self, overlay):
+        pygame.draw.rect(overlay, RED, self.square_rect, 2)  # Draw the square border
 
         # Display instructions
-        instruction_text = font.render(f"Player {player_number}, align your face", True, WHITE)
-        instruction_text2 = font.render("inside the square and press Enter", True, WHITE)
-        game_surface.blit(instruction_text, (GAME_WIDTH//2 - instruction_text.get_width()//2, 50))
-        game_surface.blit(instruction_text2, (GAME_WIDTH//2 - instruction_text2.get_width()//2, 100))
+        instruction_text = render_cache.text('Arial', 40, f"Player {self.player_number}, align your face", WHITE)
+        instruction_text2 = render_cache.text('Arial', 40, "inside the square and press Enter", WHITE)
+        overlay.blit(instruction_text, (GAME_WIDTH//2 - instruction_text.get_width()//2, 50))
+        overlay.blit(instruction_text2, (GAME_WIDTH//2 - instruction_text2.get_width()//2, 100))
+
+    def capture_face(self):
+        # Small (snake head) and large face images cut from the camera image, or None
+        x_offset, y_offset, resized_frame = self.camera_image
+
+        # Calculate the coordinates of the square in the resized frame
+        x1 = self.square_rect.left - x_offset
+        y1 = self.square_rect.top - y_offset
+        x2 = self.square_rect.right - x_offset
+        y2 = self.square_rect.bottom - y_offset
+
+        # Ensure coordinates are within frame bounds
+        x1 = max(0, x1)
+        y1 = max(0, y1)
+        x2 = min(resized_frame.shape[1], x2)
+        y2 = min(resized_frame.shape[0], y2)
+        if x2 <= x1 or y2 <= y1:
+            print("Invalid face capture area.")
+            return None
+
+        # Crop the image
+        face_image = resized_frame[y1:y2, x1:x2]
+
+        # Convert to Pygame surface
+        face_surface_large = pygame.image.frombuffer(face_image.tobytes(), face_image.shape[1::-1], "RGB")
+
+        # Resize to fit the snake head
+        face_surface_small = pygame.transform.scale(face_surface_large, (BLOCK_SIZE, BLOCK_SIZE))
+
+        return face_surface_small, face_surface_large  # Return both small and large face images
+
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_RETURN and self.camera_image is not None:
+            face = self.capture_face()
+            if face is None:
+                return
+            faces = self.faces + [face]
+            if len(faces) < self.players:
+                self.stack.replace(FaceCaptureScene(self.player_number + 1, self.players, faces))
+            elif self.players == 1:
+                self.stack.replace(CountdownScene(GameScene(single_player=True, snake1_head_image=faces[0][0])))
+            else:
+                self.stack.replace(CountdownScene(GameScene(single_player=False,
+                                                            snake1_head_image=faces[0][0],
+                                                            snake2_head_image=faces[1][0],
+                                                            player1_face_large=faces[0][1],
+                                                            player2_face_large=faces[1][1])))
+
+    def render(self, alpha):
+        # Camera background
+        processed = draw_camera_background(self.game_surface)
+        if processed is not None:
+            _, x_offset, y_offset, _, resized_frame = processed
+            self.camera_image = (x_offset, y_offset, resized_frame)
+
+        # Blit the square and instructions, composed once into a cached overlay
+        self.game_surface.blit(render_cache.overlay(('capture_player_face', self.player_number), (GAME_WIDTH, GAME_HEIGHT), self.draw_overlay), (0, 0))
 
         # Scale and center the game surface onto the window
-        scale_and_center(game_surface)
-
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                cap.release()
-                cv2.destroyAllWindows()
-                sys.exit()
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_RETURN:
-                    # Calculate the coordinates of the square in the resized frame
-                    x1 = square_rect.left - x_offset
-                    y1 = square_rect.top - y_offset
-                    x2 = square_rect.right - x_offset
-                    y2 = square_rect.bottom - y_offset
-
-                    # Ensure coordinates are within frame bounds
-                    x1 = max(0, x1)
-                    y1 = max(0, y1)
-                    x2 = min(resized_frame.shape[1], x2)
-                    y2 = min(resized_frame.shape[0], y2)
-                    if x2 <= x1 or y2 <= y1:
-                        print("Invalid face capture area.")
-                        continue
-
-                    # Crop the image
-                    face_image = resized_frame[y1:y2, x1:x2]
-
-                    # Convert to Pygame surface
-                    face_surface_large = pygame.image.frombuffer(face_image.tobytes(), face_image.shape[1::-1], "RGB")
-
-                    # Resize to fit the snake head
-                    face_surface_small = pygame.transform.scale(face_surface_large, (BLOCK_SIZE, BLOCK_SIZE))
-
-                    return face_surface_small, face_surface_large  # Return both small and large face images
-                elif event.key == pygame.K_f:
-                    toggle_fullscreen()
-                elif event.key == pygame.K_ESCAPE:
-                    if is_fullscreen:
-                        toggle_fullscreen()
-                elif event.key == pygame.K_q:
-                    pygame.quit()
-                    cap.release()
-                    cv2.destroyAllWindows()
-                    sys.exit()
-
-def game_over_screen(final_game_surface, winner_face_image=None):
-    game_over_font = pygame.font.SysFont('Arial', 50)
-    info_font = pygame.font.SysFont('Arial', 30)
-    run = True
-    while run:
-        # Use the final game surface
-        game_surface = final_game_surface.copy()
+        scale_and_center(self.game_surface)
+
+class GameOverScene(Scene):
+    # The final frame dimmed, with the winner's face or "Game Over!"; it
+    # only needs redrawing after events (resize, fullscreen)
+    render_fps = None
+
+    def __init__(self, final_game_surface, winner_face_image=None):
+        super().__init__()
+        # Nothing on this screen changes while it is shown, so compose it once
+        self.game_surface = game_surface = final_game_surface.copy()
 
         # Dim the background by overlaying a semi-transparent black surface
-        dim_surface = pygame.Surface((GAME_WIDTH, GAME_HEIGHT))
-        dim_surface.set_alpha(150)  # Adjust alpha value for the desired dim effect (0-255)
-        dim_surface.fill(BLACK)
+        dim_alpha = 150  # Adjust alpha value for the desired dim effect (0-255)
+        dim_surface = render_cache.overlay(('dim', dim_alpha), (GAME_WIDTH, GAME_HEIGHT),
+                                           lambda overlay: overlay.fill(BLACK + (dim_alpha,)))
         game_surface.blit(dim_surface, (0, 0))
 
         # Calculate positions
@@ -224,7 +329,7 @@ def game_over_screen(final_game_surface, winner_face_image=None):
 
         if winner_face_image is not None:
             # Display winner's face and label
-            winner_label = game_over_font.render("Winner!", True, RED)
+            winner_label = render_cache.text('Arial', 50, "Winner!", RED)
             # Resize winner's face image to fit in the screen if necessary
             face_width = winner_face_image.get_width()
             face_height = winner_face_image.get_height()
@@ -244,458 +349,356 @@ def game_over_screen(final_game_surface, winner_face_image=None):
             top_offset += winner_label.get_height() + spacing
         else:
             # It's a draw or single-player game over
-            over_text = game_over_font.render("Game Over!", True, RED)
+            over_text = render_cache.text('Arial', 50, "Game Over!", RED)
             elements.append((over_text, (GAME_WIDTH//2 - over_text.get_width()//2, top_offset)))
             top_offset += over_text.get_height() + spacing
 
         # Other texts
-        continue_text = game_over_font.render("Press 'c' to continue", True, WHITE)
+        continue_text = render_cache.text('Arial', 50, "Press 'c' to continue", WHITE)
         elements.append((continue_text, (GAME_WIDTH//2 - continue_text.get_width()//2, top_offset)))
         top_offset += continue_text.get_height() + spacing
 
-        fullscreen_text = info_font.render("Press 'f' to toggle Full Screen", True, WHITE)
+        fullscreen_text = render_cache.text('Arial', 30, "Press 'f' to toggle Full Screen", WHITE)
         elements.append((fullscreen_text, (GAME_WIDTH//2 - fullscreen_text.get_width()//2, top_offset)))
         top_offset += fullscreen_text.get_height() + spacing
 
-        quit_text = info_font.render("Press 'q' to Quit", True, WHITE)
+        quit_text = render_cache.text('Arial', 30, "Press 'q' to Quit", WHITE)
         elements.append((quit_text, (GAME_WIDTH//2 - quit_text.get_width()//2, top_offset)))
 
         # Blit all elements onto the game surface
         for element, position in elements:
             game_surface.blit(element, position)
-
-        # Scale and center the game surface onto the window
-        scale_and_center(game_surface)
-
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                cap.release()
-                cv2.destroyAllWindows()
-                sys.exit()
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_f:
-                    toggle_fullscreen()
-                elif event.key == pygame.K_ESCAPE:
-                    if is_fullscreen:
-                        toggle_fullscreen()
-                elif event.key == pygame.K_q:
-                    pygame.quit()
-                    cap.release()
-                    cv2.destroyAllWindows()
-                    sys.exit()
-                elif event.key == pygame.K_c:
-                    run = False
-
-def game_loop(single_player=True, snake1_head_image=None, snake2_head_image=None, player1_face_large=None, player2_face_large=None):
-    # Initialize snake(s)
-    snake1_pos = [BLOCK_SIZE * 5, BLOCK_SIZE * 5]  # Ensure starting position aligns with BLOCK_SIZE grid
-    snake1_body = [list(snake1_pos),
-                   [snake1_pos[0] - BLOCK_SIZE, snake1_pos[1]],
-                   [snake1_pos[0] - (2 * BLOCK_SIZE), snake1_pos[1]]]
-    snake1_direction = 'RIGHT'
-    change_to1 = snake1_direction
-
-    # For double player mode
-    if not single_player:
-        snake2_pos = [BLOCK_SIZE * (GAME_WIDTH // BLOCK_SIZE - 5), BLOCK_SIZE * (GAME_HEIGHT // BLOCK_SIZE - 5)]
-        snake2_body = [list(snake2_pos),
-                       [snake2_pos[0] + BLOCK_SIZE, snake2_pos[1]],
-                       [snake2_pos[0] + (2 * BLOCK_SIZE), snake2_pos[1]]]
-        snake2_direction = 'LEFT'
-        change_to2 = snake2_direction
-    else:
-        snake2_pos = None  # Define snake2_pos as None for single-player mode
-
-    # Food settings
-    food_pos = [np.random.randint(0, GAME_WIDTH // BLOCK_SIZE) * BLOCK_SIZE,
-                np.random.randint(0, GAME_HEIGHT // BLOCK_SIZE) * BLOCK_SIZE]
-    food_spawn = True
-
-    # Game variables
-    pause = False
-    game_over_flag = False
-    winner_face_image = None  # To store the winner's face image
-
-    # Countdown before the game starts
-    countdown(single_player, snake1_head_image, snake2_head_image, snake1_pos, snake2_pos)
-
-    while True:
-        # Event handling
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                cap.release()
-                cv2.destroyAllWindows()
-                sys.exit()
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_SPACE:
-                    pause = not pause
-                elif event.key == pygame.K_f:
-                    toggle_fullscreen()
-                elif event.key == pygame.K_ESCAPE:
-                    if is_fullscreen:
-                        toggle_fullscreen()
-                elif event.key == pygame.K_q:
-                    pygame.quit()
-                    cap.release()
-                    cv2.destroyAllWindows()
-                    sys.exit()
-                if not pause:
-                    # Controls for snake 1
-                    if single_player:
-                        # In single-player mode, allow both arrow keys and W/A/S/D
-                        if event.key == pygame.K_UP or event.key == ord('w'):
-                            if snake1_direction != 'DOWN':
-                                change_to1 = 'UP'
-                        elif event.key == pygame.K_DOWN or event.key == ord('s'):
-                            if snake1_direction != 'UP':
-                                change_to1 = 'DOWN'
-                        elif event.key == pygame.K_LEFT or event.key == ord('a'):
-                            if snake1_direction != 'RIGHT':
-                                change_to1 = 'LEFT'
-                        elif event.key == pygame.K_RIGHT or event.key == ord('d'):
-                            if snake1_direction != 'LEFT':
-                                change_to1 = 'RIGHT'
-                    else:
-                        # In double-player mode, arrow keys control snake1
-                        if event.key == pygame.K_UP:
-                            if snake1_direction != 'DOWN':
-                                change_to1 = 'UP'
-                        elif event.key == pygame.K_DOWN:
-                            if snake1_direction != 'UP':
-                                change_to1 = 'DOWN'
-                        elif event.key == pygame.K_LEFT:
-                            if snake1_direction != 'RIGHT':
-                                change_to1 = 'LEFT'
-                        elif event.key == pygame.K_RIGHT:
-                            if snake1_direction != 'LEFT':
-                                change_to1 = 'RIGHT'
-
-                        # Controls for snake 2
-                        if event.key == ord('w'):
-                            if snake2_direction != 'DOWN':
-                                change_to2 = 'UP'
-                        elif event.key == ord('s'):
-                            if snake2_direction != 'UP':
-                                change_to2 = 'DOWN'
-                        elif event.key == ord('a'):
-                            if snake2_direction != 'RIGHT':
-                                change_to2 = 'LEFT'
-                        elif event.key == ord('d'):
-                            if snake2_direction != 'LEFT':
-                                change_to2 = 'RIGHT'
-        if pause:
-            continue
-
-        # Validate direction for snake1
-        if change_to1 == 'UP' and snake1_direction != 'DOWN':
-            snake1_direction = 'UP'
-        if change_to1 == 'DOWN' and snake1_direction != 'UP':
-            snake1_direction = 'DOWN'
-        if change_to1 == 'LEFT' and snake1_direction != 'RIGHT':
-            snake1_direction = 'LEFT'
-        if change_to1 == 'RIGHT' and snake1_direction != 'LEFT':
-            snake1_direction = 'RIGHT'
-
-        # Update snake1 position
-        if snake1_direction == 'UP':
-            snake1_pos[1] -= BLOCK_SIZE
-        if snake1_direction == 'DOWN':
-            snake1_pos[1] += BLOCK_SIZE
-        if snake1_direction == 'LEFT':
-            snake1_pos[0] -= BLOCK_SIZE
-        if snake1_direction == 'RIGHT':
-            snake1_pos[0] += BLOCK_SIZE
-
-        # Wrap snake1 position around the screen
-        snake1_pos[0] %= GAME_WIDTH
-        snake1_pos[1] %= GAME_HEIGHT
-
-        snake1_body.insert(0, list(snake1_pos))
-        if snake1_pos == food_pos:
-            food_spawn = False
+        self.first_frame = True
+
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_c:
+            # Back to the main menu
+            self.stack.pop()
+
+    def render(self, alpha):
+        # Scale and center the game surface onto the window; after the first
+        # frame nothing changes, so there is nothing to update
+        scale_and_center(self.game_surface, None if self.first_frame else [])
+        self.first_frame = False
+
+def draw_snakes_and_food(game_surface, state, alpha, snake1_head_image=None, snake2_head_image=None, draw_food=True):
+    # Draw the snakes interpolated by alpha and the food from scratch (the
+    # countdown does; the game keeps them on a playfield layer instead, see
+    # draw_playfield); returns the rectangles drawn on, for dirty-rect
+    # updates. Everything goes through sprite_batch, so it takes a few fills
+    # and one blits call.
+    snake_colors = (WHITE, YELLOW)
+    head_images = (snake1_head_image, snake2_head_image)
+    for snake_idx, snake in enumerate(state.snakes[:1] if state.single_player else state.snakes[:2]):
+        positions = interpolate_body(snake, alpha, BLOCK_SIZE, state.cols)
+        if head_images[snake_idx]:
+            # Draw the head image
+            sprite_batch.blit(head_images[snake_idx], positions[0])
+            positions = positions[1:]
+        color = snake_colors[snake_idx]
+        for pos in positions:
+            sprite_batch.block(color, pos)
+
+    # Draw food
+    if draw_food and state.food is not None:
+        food_col, food_row = snake_engine.cell_position(state, state.food)
+        sprite_batch.block(RED, (food_col * BLOCK_SIZE, food_row * BLOCK_SIZE))
+
+    return sprite_batch.draw(game_surface)
+
+def update_playfield(playfield, state, full=False):
+    # Bring a game's playfield layer up to date after a tick: the old head
+    # became a body segment, the old second-to-last segment is now the tail
+    # (which is drawn sliding off its cell every frame, so it is cleared from
+    # the layer) and the food may have moved. full=True draws the whole board
+    # from scratch instead.
+    snakes = state.snakes[:1] if state.single_player else state.snakes[:2]
+    if full:
+        playfield.clear()
+    for snake in snakes:
+        playfield.set(snake.body[-1], None)
+    snake_colors = (WHITE, YELLOW)
+    for snake_idx, snake in enumerate(snakes):
+        # Between the head and the tail; after a tick only the old head is new
+        end = len(snake.body) - 1 if full else min(2, len(snake.body) - 1)
+        for cell in islice(snake.body, 1, end):
+            playfield.set(cell, snake_colors[snake_idx])
+    playfield.move('food', state.food, RED)
+
+def draw_playfield(game_surface, playfield, state, alpha, snake1_head_image=None, snake2_head_image=None):
+    # The game's per-frame drawing: composite the playfield layer (bodies
+    # and food), then draw the heads and tails sliding between cells on top.
+    # Returns the rectangles that changed, for dirty-rect updates.
+    drawn_rects = playfield.draw(game_surface)
+    snake_colors = (WHITE, YELLOW)
+    head_images = (snake1_head_image, snake2_head_image)
+    for snake_idx, snake in enumerate(state.snakes[:1] if state.single_player else state.snakes[:2]):
+        head_pos, tail_pos = interpolate_ends(snake, alpha, BLOCK_SIZE, state.cols)
+        color = snake_colors[snake_idx]
+        sprite_batch.block(color, tail_pos)
+        if head_images[snake_idx]:
+            sprite_batch.blit(head_images[snake_idx], head_pos)
         else:
-            snake1_body.pop()
-
-        if not single_player:
-            # Validate direction for snake2
-            if change_to2 == 'UP' and snake2_direction != 'DOWN':
-                snake2_direction = 'UP'
-            if change_to2 == 'DOWN' and snake2_direction != 'UP':
-                snake2_direction = 'DOWN'
-            if change_to2 == 'LEFT' and snake2_direction != 'RIGHT':
-                snake2_direction = 'LEFT'
-            if change_to2 == 'RIGHT' and snake2_direction != 'LEFT':
-                snake2_direction = 'RIGHT'
-
-            # Update snake2 position
-            if snake2_direction == 'UP':
-                snake2_pos[1] -= BLOCK_SIZE
-            if snake2_direction == 'DOWN':
-                snake2_pos[1] += BLOCK_SIZE
-            if snake2_direction == 'LEFT':
-                snake2_pos[0] -= BLOCK_SIZE
-            if snake2_direction == 'RIGHT':
-                snake2_pos[0] += BLOCK_SIZE
-
-            # Wrap snake2 position around the screen
-            snake2_pos[0] %= GAME_WIDTH
-            snake2_pos[1] %= GAME_HEIGHT
-
-            snake2_body.insert(0, list(snake2_pos))
-            if snake2_pos == food_pos:
-                food_spawn = False
+            sprite_batch.block(color, head_pos)
+    drawn_rects.extend(sprite_batch.draw(game_surface))
+    return drawn_rects
+
+class GameScene(Scene):
+    # The game itself. Game rules live in snake_engine; this scene handles
+    # input, timing and drawing. Logic runs at `speed` ticks per second,
+    # rendering at RENDER_FPS.
+    def __init__(self, single_player=True, snake1_head_image=None, snake2_head_image=None, player1_face_large=None, player2_face_large=None):
+        super().__init__()
+        self.single_player = single_player
+        self.snake1_head_image = snake1_head_image
+        self.snake2_head_image = snake2_head_image
+        self.player1_face_large = player1_face_large
+        self.player2_face_large = player2_face_large
+
+        self.state = state = snake_engine.new_game(GAME_WIDTH // BLOCK_SIZE, GAME_HEIGHT // BLOCK_SIZE, single_player)
+        self.change_to1 = state.snakes[0].direction
+        self.change_to2 = state.snakes[1].direction if not single_player else None
+
+        # Game variables
+        self.pause = False
+        self.tick_rate = speed
+
+        # Areas drawn on in the previous frame, which need repainting in this one
+        self.prev_drawn_rects = None
+
+        # Lowers the camera background quality when frames go over budget
+        self.governor = QualityGovernor(RENDER_FPS, fixed_level=BACKGROUND_QUALITY)
+
+        # Game surface with the original game dimensions, redrawn every frame.
+        # With a native camera background the frame is drawn on a transparent
+        # overlay (per-pixel alpha, so the HUD and icon edges blend into the
+        # camera) instead.
+        self.game_surface = self.opaque_surface = pygame.Surface((GAME_WIDTH, GAME_HEIGHT))
+        self.overlay_surface = None
+        self.native_background = None
+
+        # Snake bodies and food, updated as the game ticks and composited
+        # over the background every frame
+        self.playfield = Playfield(GAME_WIDTH, GAME_HEIGHT, BLOCK_SIZE)
+        update_playfield(self.playfield, state, full=True)
+
+    @property
+    def render_fps(self):
+        # While paused nothing moves, so only wait for events
+        return None if self.pause else RENDER_FPS
+
+    def begin_frame(self):
+        self.governor.frame_started()
+
+    def handle_event(self, event):
+        if event.type != pygame.KEYDOWN:
+            return
+        if event.key == pygame.K_SPACE:
+            self.pause = not self.pause
+        elif event.key == pygame.K_F3:
+            profiler.toggle_hud()
+        if not self.pause:
+            # Controls for snake 1
+            if self.single_player:
+                # In single-player mode, allow both arrow keys and W/A/S/D
+                if event.key == pygame.K_UP or event.key == ord('w'):
+                    if self.state.snakes[0].direction != 'DOWN':
+                        self.change_to1 = 'UP'
+                elif event.key == pygame.K_DOWN or event.key == ord('s'):
+                    if self.state.snakes[0].direction != 'UP':
+                        self.change_to1 = 'DOWN'
+                elif event.key == pygame.K_LEFT or event.key == ord('a'):
+                    if self.state.snakes[0].direction != 'RIGHT':
+                        self.change_to1 = 'LEFT'
+                elif event.key == pygame.K_RIGHT or event.key == ord('d'):
+                    if self.state.snakes[0].direction != 'LEFT':
+                        self.change_to1 = 'RIGHT'
             else:
-                snake2_body.pop()
-
-        # Spawn food
-        if not food_spawn:
-            while True:
-                food_pos = [np.random.randint(0, GAME_WIDTH // BLOCK_SIZE) * BLOCK_SIZE,
-                            np.random.randint(0, GAME_HEIGHT // BLOCK_SIZE) * BLOCK_SIZE]
-                # Ensure food doesn't spawn on top of the snake
-                if (food_pos not in snake1_body) and (single_player or food_pos not in snake2_body):
-                    break
-            food_spawn = True
-
-        # Game Over conditions
-        # For snake1
-        for block in snake1_body[1:]:
-            if snake1_pos == block:
-                # Player 1 collided with itself; Player 2 wins
-                winner_face_image = player2_face_large if not single_player else None
-                game_over_flag = True
-                break
-
-        if game_over_flag:
-            pass  # Already determined the winner
-        else:
-            # For snake2
-            if not single_player:
-                for block in snake2_body[1:]:
-                    if snake2_pos == block:
-                        # Player 2 collided with itself; Player 1 wins
-                        winner_face_image = player1_face_large
-                        game_over_flag = True
-                        break
-
-                if not game_over_flag:
-                    # Check if snake1's head collides with snake2's body (excluding head)
-                    for block in snake2_body[1:]:
-                        if snake1_pos == block:
-                            # Player 1 hit Player 2's body; Player 2 wins
-                            winner_face_image = player2_face_large
-                            game_over_flag = True
-                            break
-
-                if not game_over_flag:
-                    # Check if snake2's head collides with snake1's body (excluding head)
-                    for block in snake1_body[1:]:
-                        if snake2_pos == block:
-                            # Player 2 hit Player 1's body; Player 1 wins
-                            winner_face_image = player1_face_large
-                            game_over_flag = True
-                            break
-
-                if not game_over_flag:
-                    # Check if both snakes' heads collide
-                    if snake1_pos == snake2_pos:
-                        # It's a draw
-                        winner_face_image = None
-                        game_over_flag = True
-
-        # Create a game surface with the original game dimensions
-        game_surface = pygame.Surface((GAME_WIDTH, GAME_HEIGHT))
+                # In double-player mode, arrow keys control snake1
+                if event.key == pygame.K_UP:
+                    if self.state.snakes[0].direction != 'DOWN':
+                        self.change_to1 = 'UP'
+                elif event.key == pygame.K_DOWN:
+                    if self.state.snakes[0].direction != 'UP':
+                        self.change_to1 = 'DOWN'
+                elif event.key == pygame.K_LEFT:
+                    if self.state.snakes[0].direction != 'RIGHT':
+                        self.change_to1 = 'LEFT'
+                elif event.key == pygame.K_RIGHT:
+                    if self.state.snakes[0].direction != 'LEFT':
+                        self.change_to1 = 'RIGHT'
+
+                # Controls for snake 2
+                if event.key == ord('w'):
+                    if self.state.snakes[1].direction != 'DOWN':
+                        self.change_to2 = 'UP'
+                elif event.key == ord('s'):
+                    if self.state.snakes[1].direction != 'UP':
+                        self.change_to2 = 'DOWN'
+                elif event.key == ord('a'):
+                    if self.state.snakes[1].direction != 'RIGHT':
+                        self.change_to2 = 'LEFT'
+                elif event.key == ord('d'):
+                    if self.state.snakes[1].direction != 'LEFT':
+                        self.change_to2 = 'RIGHT'
+
+    def tick(self):
+        # One game logic tick; nothing moves once the game is over
+        if self.state.game_over:
+            return
+        start = profiler.begin()
+        snake_engine.step(self.state, (self.change_to1, self.change_to2))
+        update_playfield(self.playfield, self.state)
+        profiler.end('game_logic', start)
+
+    def render(self, alpha):
+        if self.pause:
+            # Repaint the frozen frame after a resize or fullscreen switch
+            scale_and_center(self.game_surface, [], self.native_background)
+            return
 
         # Capture camera frame
-        ret, frame = cap.read()
+        ret = False
+        self.native_background = None
+        self.game_surface = self.opaque_surface
+        background_changed = CAMERA_BACKGROUND
+        if CAMERA_BACKGROUND:
+            start = profiler.begin()
+            ret, frame = camera.read()
+            profiler.end('camera_read', start)
+
+            # The governor picks the background quality, and whether the last
+            # background is reused instead of processing a new camera image
+            reuse = not self.governor.refresh_background()
+            start = profiler.begin()
+            if ret and NATIVE_CAMERA_BACKGROUND and display.scaling and not CAMERA_WORKER_PROCESS:
+                # The camera goes straight to the screen below the game
+                # surface, which only keeps the snakes and food
+                self.native_background = process_camera_frame_for_display(frame, self.governor.quality, reuse)
+                background_changed = output_camera_processor.updated
+                if self.overlay_surface is None:
+                    self.overlay_surface = pygame.Surface((GAME_WIDTH, GAME_HEIGHT), pygame.SRCALPHA)
+                self.game_surface = self.overlay_surface
+                self.game_surface.fill((0, 0, 0, 0))
+            elif ret:
+                # Process camera frame
+                frame_surface, _, _, _, _ = process_camera_frame(frame, self.governor.quality, reuse)
+                background_changed = camera_processor.updated
+
+                # Display camera frame on the game surface
+                self.game_surface.blit(frame_surface, (0, 0))
+            profiler.end('process_camera_frame', start)
         if not ret:
-            continue
-
-        # Process camera frame
-        frame_surface, _, _, _, _ = process_camera_frame(frame)
-
-        # Display camera frame on the game surface
-        game_surface.blit(frame_surface, (0, 0))
+            self.game_surface.fill(BLACK)
 
-        # Draw snake1
-        for idx, pos in enumerate(snake1_body):
-            if idx == 0 and snake1_head_image:
-                # Draw the head image
-                game_surface.blit(snake1_head_image, (pos[0], pos[1]))
-            else:
-                pygame.draw.rect(game_surface, WHITE, pygame.Rect(pos[0], pos[1], BLOCK_SIZE, BLOCK_SIZE))
-
-        # Draw snake2
-        if not single_player:
-            for idx, pos in enumerate(snake2_body):
-                if idx == 0 and snake2_head_image:
-                    # Draw the head image
-                    game_surface.blit(snake2_head_image, (pos[0], pos[1]))
-                else:
-                    pygame.draw.rect(game_surface, YELLOW, pygame.Rect(pos[0], pos[1], BLOCK_SIZE, BLOCK_SIZE))
+        # Interpolate the snakes between the last two ticks; before the first
+        # tick and on the final frame before game over they are drawn exactly
+        alpha = 1.0 if self.state.game_over or self.state.tick == 0 else alpha
 
-        # Draw food
-        pygame.draw.rect(game_surface, RED, pygame.Rect(food_pos[0], food_pos[1], BLOCK_SIZE, BLOCK_SIZE))
+        # Draw the snakes and food, keeping the rectangles drawn on for dirty-rect updates
+        start = profiler.begin()
+        drawn_rects = draw_playfield(self.game_surface, self.playfield, self.state, alpha, self.snake1_head_image, self.snake2_head_image)
+        profiler.end('draw_snakes', start)
 
         # Check for game over after drawing the final frame
-        if game_over_flag:
-            game_over_screen(game_surface, winner_face_image)
-            return  # Return to main menu
+        if self.state.game_over:
+            # No winner face for a draw or a single-player game
+            winner_face_image = None
+            if self.state.winner is not None:
+                winner_face_image = (self.player1_face_large, self.player2_face_large)[self.state.winner]
+            if self.native_background is not None:
+                # Put the camera back under the final frame at game resolution
+                final_surface = process_camera_frame(frame)[0].copy()
+                final_surface.blit(self.game_surface, (0, 0))
+                self.game_surface = final_surface
+            self.stack.replace(GameOverScene(self.game_surface, winner_face_image))
+            return
+
+        # Stage timings overlay
+        hud_rect = profiler.draw_hud(self.game_surface, render_cache.font('Courier', 16))
+        if hud_rect:
+            drawn_rects.append(hud_rect)
+
+        # With a static background (or a reused camera image) only the areas
+        # drawn on in this frame or the last one have changed; a new camera
+        # background (or the first frame) changes everywhere
+        if background_changed or self.prev_drawn_rects is None:
+            dirty_rects = None
+        else:
+            dirty_rects = self.prev_drawn_rects + drawn_rects
+        self.prev_drawn_rects = drawn_rects
 
         # Scale and center the game surface onto the window
-        scale_and_center(game_surface)
-
-        # Control game speed
-        clock.tick(speed)
+        scale_and_center(self.game_surface, dirty_rects, self.native_background)
+        self.governor.frame_finished()
+        profiler.frame_finished()
+
+def draw_countdown_overlay(overlay, count):
+    # Render countdown text
+    countdown_text = render_cache.text('Arial', 100, count, WHITE)
+    overlay.blit(countdown_text, (GAME_WIDTH//2 - countdown_text.get_width()//2, GAME_HEIGHT//2 - countdown_text.get_height()//2))
+
+    # Display get ready text
+    get_ready_text = render_cache.text('Arial', 30, "Get Ready!", WHITE)
+    overlay.blit(get_ready_text, (GAME_WIDTH//2 - get_ready_text.get_width()//2, GAME_HEIGHT//2 - countdown_text.get_height()))
+
+class CountdownScene(Scene):
+    # "3", "2", "1", "Go!" for a second each over the live camera and the
+    # snakes in their starting positions, then the game starts
+    COUNTS = ["3", "2", "1", "Go!"]
+    tick_rate = 1
+
+    def __init__(self, game):
+        super().__init__()
+        self.game = game
+        self.count = 0
+        # Game surface with the original game dimensions, reused every frame
+        self.game_surface = pygame.Surface((GAME_WIDTH, GAME_HEIGHT))
+
+    @property
+    def render_fps(self):
+        # The camera stays live at the game's frame rate
+        return RENDER_FPS
+
+    def tick(self):
+        self.count += 1
+        if self.count == len(self.COUNTS):
+            self.stack.replace(self.game)
+
+    def render(self, alpha):
+        # Capture camera frame
+        if CAMERA_BACKGROUND:
+            draw_camera_background(self.game_surface)
+        else:
+            self.game_surface.fill(BLACK)
 
-def countdown(single_player, snake1_head_image, snake2_head_image, snake1_pos, snake2_pos):
-    countdown_font = pygame.font.SysFont('Arial', 100)
-    info_font = pygame.font.SysFont('Arial', 30)
-    for count in ["3", "2", "1", "Go!"]:
-        # Create a game surface with the original game dimensions
-        game_surface = pygame.Surface((GAME_WIDTH, GAME_HEIGHT))
+        # Draw the snakes in their starting positions
+        draw_snakes_and_food(self.game_surface, self.game.state, 1.0, self.game.snake1_head_image, self.game.snake2_head_image, draw_food=False)
 
-        # Capture camera frame
-        ret, frame = cap.read()
-        if not ret:
-            continue
-
-        # Process camera frame
-        frame_surface, _, _, _, _ = process_camera_frame(frame)
-
-        # Display camera frame on the game surface
-        game_surface.blit(frame_surface, (0, 0))
-
-        # Optionally, you can draw the snakes in their starting positions
-        # Draw snake1
-        initial_snake1_body = [list(snake1_pos),
-                               [snake1_pos[0] - BLOCK_SIZE, snake1_pos[1]],
-                               [snake1_pos[0] - (2 * BLOCK_SIZE), snake1_pos[1]]]
-        for idx, pos in enumerate(initial_snake1_body):
-            if idx == 0 and snake1_head_image:
-                # Draw the head image
-                game_surface.blit(snake1_head_image, (pos[0], pos[1]))
-            else:
-                pygame.draw.rect(game_surface, WHITE, pygame.Rect(pos[0], pos[1], BLOCK_SIZE, BLOCK_SIZE))
-
-        # Draw snake2 if double-player
-        if not single_player and snake2_pos is not None:
-            initial_snake2_body = [list(snake2_pos),
-                                   [snake2_pos[0] + BLOCK_SIZE, snake2_pos[1]],
-                                   [snake2_pos[0] + (2 * BLOCK_SIZE), snake2_pos[1]]]
-            for idx, pos in enumerate(initial_snake2_body):
-                if idx == 0 and snake2_head_image:
-                    # Draw the head image
-                    game_surface.blit(snake2_head_image, (pos[0], pos[1]))
-                else:
-                    pygame.draw.rect(game_surface, YELLOW, pygame.Rect(pos[0], pos[1], BLOCK_SIZE, BLOCK_SIZE))
-
-        # Render countdown text
-        countdown_text = countdown_font.render(count, True, WHITE)
-        game_surface.blit(countdown_text, (GAME_WIDTH//2 - countdown_text.get_width()//2, GAME_HEIGHT//2 - countdown_text.get_height()//2))
-
-        # Optional: Display instructions or get ready text
-        get_ready_text = info_font.render("Get Ready!", True, WHITE)
-        game_surface.blit(get_ready_text, (GAME_WIDTH//2 - get_ready_text.get_width()//2, GAME_HEIGHT//2 - countdown_text.get_height()))
+        # Blit the countdown text, composed once per count into a cached overlay
+        count = self.COUNTS[self.count]
+        overlay = render_cache.overlay(('countdown', count), (GAME_WIDTH, GAME_HEIGHT),
+                                       lambda overlay: draw_countdown_overlay(overlay, count))
+        self.game_surface.blit(overlay, (0, 0))
 
         # Scale and center the game surface onto the window
-        scale_and_center(game_surface)
-
-        # Wait for a second
-        pygame.time.delay(1000)
-
-        # Handle events during the countdown
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                cap.release()
-                cv2.destroyAllWindows()
-                sys.exit()
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_f:
-                    toggle_fullscreen()
-                elif event.key == pygame.K_ESCAPE:
-                    if is_fullscreen:
-                        toggle_fullscreen()
-                elif event.key == pygame.K_q:
-                    pygame.quit()
-                    cap.release()
-                    cv2.destroyAllWindows()
-                    sys.exit()
-
-def process_camera_frame(frame):
-    # Flip and convert to RGB
-    frame = cv2.flip(frame, 1)  # Flip horizontally to mirror the image
-    frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-
-    # Get the frame dimensions
-    frame_height, frame_width = frame.shape[:2]
-
-    # Calculate the aspect ratios
-    frame_aspect = frame_width / frame_height
-    game_aspect = GAME_WIDTH / GAME_HEIGHT
-
-    # Determine scaling factors to preserve aspect ratio
-    if frame_aspect > game_aspect:
-        # Frame is wider than game surface
-        scale_factor = GAME_HEIGHT / frame_height
-    else:
-        # Frame is taller than game surface
-        scale_factor = GAME_WIDTH / frame_width
-
-    # Calculate new dimensions
-    new_width =  int(frame_width * scale_factor)
-    new_height = int(frame_height * scale_factor)
-
-    # Resize frame
-    resized_frame = cv2.resize(frame, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
-
-    # Convert frame to Pygame surface
-    frame_surface = pygame.image.frombuffer(resized_frame.tobytes(), (new_width, new_height), "RGB")
-
-    # Create a black background
-    background = pygame.Surface((GAME_WIDTH, GAME_HEIGHT))
-    background.fill(BLACK)
-
-    # Blit the resized frame onto the background to center it
-    x_offset = (GAME_WIDTH - new_width) // 2
-    y_offset = (GAME_HEIGHT - new_height) // 2
-    background.blit(frame_surface, (x_offset, y_offset))
-
-    return background, x_offset, y_offset, scale_factor, resized_frame
-
-def scale_and_center(game_surface):
-    if is_fullscreen:
-        # Get full-screen dimensions
-        infoObject = pygame.display.Info()
-        SCREEN_WIDTH, SCREEN_HEIGHT = infoObject.current_w, infoObject.current_h
-
-        # Calculate the scaling factor to fit the game surface into the screen
-        scale_width = SCREEN_WIDTH / GAME_WIDTH
-        scale_height = SCREEN_HEIGHT / GAME_HEIGHT
-        scale = min(scale_width, scale_height)
-
-        # Calculate new dimensions
-        new_width = int(GAME_WIDTH * scale)
-        new_height = int(GAME_HEIGHT * scale)
-
-        # Scale the game surface
-        scaled_surface = pygame.transform.smoothscale(game_surface, (new_width, new_height))
-
-        # Calculate position to center the game surface
-        pos_x = (SCREEN_WIDTH - new_width) // 2
-        pos_y = (SCREEN_HEIGHT - new_height) // 2
-
-        # Blit the scaled surface onto the window
-        window.blit(scaled_surface, (pos_x, pos_y))
-    else:
-        # In windowed mode, simply blit the game surface onto the window
-        window.blit(game_surface, (0, 0))
-
-    # Update the display
-    pygame.display.update()
+        scale_and_center(self.game_surface)
+
+def process_camera_frame(frame, quality=QUALITY_FULL, reuse=False):
+    # Mirror, convert and scale the frame into the reusable background surface
+    return camera_processor.process(frame, quality, reuse)
+
+def process_camera_frame_for_display(frame, quality=QUALITY_FULL, reuse=False):
+    # Camera background at the size the game is shown at on screen
+    output_camera_processor.set_output_size(*display.scaled_rect.size)
+    return output_camera_processor.process(frame, quality, reuse)[0]
+
+def scale_and_center(game_surface, dirty_rects=None, background=None):
+    # dirty_rects lists the areas of game_surface that changed since the last
+    # frame (None: everything may have changed, []: nothing did)
+    if not DIRTY_RECT_UPDATES:
+        dirty_rects = None
+    display.present(game_surface, dirty_rects, background)
 
 if __name__ == '__main__':
     main_menu()
\ No newline at end of file
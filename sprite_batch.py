@@ -0,0 +1,63 @@
+class SpriteBatch:
+    # Collects what one frame draws on a surface and draws it with as few
+    # calls as possible:
+    #   - images added with blit() go to the surface in one Surface.blits()
+    #     call (fblits() where pygame has it and the drawn rects aren't
+    #     needed), in the order they were added
+    #   - plain colour blocks of block_size added with block() are merged
+    #     into runs (consecutive blocks side by side in a row or column, as
+    #     snake segments are) and each run is drawn with a single fill()
+    # Blocks are drawn before images, so images always end up on top.
+    # draw() empties the batch, so one batch can be reused every frame.
+    def __init__(self, block_size):
+        self.block_size = block_size
+        self.images = []
+        self.runs = []  # [color, x, y, width, height]
+
+    def clear(self):
+        self.images.clear()
+        self.runs.clear()
+
+    def blit(self, image, pos):
+        self.images.append((image, pos))
+
+    def block(self, color, pos):
+        size = self.block_size
+        x, y = pos
+        if self.runs:
+            run = self.runs[-1]
+            if run[0] == color:
+                _, run_x, run_y, width, height = run
+                if height == size and y == run_y:
+                    # Extend a horizontal run to the right or the left
+                    if x == run_x + width:
+                        run[3] += size
+                        return
+                    if x == run_x - size:
+                        run[1] = x
+                        run[3] += size
+                        return
+                if width == size and x == run_x:
+                    # Extend a vertical run downwards or upwards
+                    if y == run_y + height:
+                        run[4] += size
+                        return
+                    if y == run_y - size:
+                        run[2] = y
+                        run[4] += size
+                        return
+        self.runs.append([color, x, y, size, size])
+
+    def draw(self, surface, return_rects=True):
+        # Draw and empty the batch. Returns the rects drawn on, clipped to
+        # the surface, or an empty list without return_rects.
+        rects = [surface.fill(color, (x, y, width, height)) for color, x, y, width, height in self.runs]
+        if self.images:
+            if return_rects:
+                rects.extend(surface.blits(self.images))
+            elif hasattr(surface, 'fblits'):
+                surface.fblits(self.images)
+            else:
+                surface.blits(self.images, False)
+        self.clear()
+        return rects if return_rects else []
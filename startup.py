@@ -0,0 +1,50 @@
+import threading
+import time
+
+
+class Startup:
+    # Times the game's startup and runs its slow parts (opening the camera,
+    # decoding assets) on background threads, so the window and menu can be
+    # shown before they are done:
+    #     startup = Startup()
+    #     startup.background('camera', open_camera)
+    #     ... open the window, draw the menu ...
+    #     startup.mark('first_frame')
+    # Every milestone is printed once and kept in `metrics` as milliseconds
+    # since the Startup was created: 'first_frame_ms' is the time to first
+    # frame, '<task>_ms' the time a background task finished.
+    def __init__(self):
+        self.start_time = time.perf_counter()
+        self.metrics = {}
+        self._lock = threading.Lock()
+        self._threads = {}
+
+    def mark(self, name):
+        # Record that `name` has happened; only the first call counts
+        elapsed_ms = (time.perf_counter() - self.start_time) * 1000.0
+        with self._lock:
+            if f'{name}_ms' in self.metrics:
+                return
+            self.metrics[f'{name}_ms'] = elapsed_ms
+        print(f"Startup: {name.replace('_', ' ')} after {elapsed_ms:.0f} ms")
+
+    def background(self, name, task):
+        # Run task() on a daemon thread and mark `name` when it returns
+        def run():
+            try:
+                task()
+            except Exception as e:
+                print(f"Startup: {name.replace('_', ' ')} failed: {e}")
+                return
+            self.mark(name)
+
+        thread = threading.Thread(target=run, name=f"Startup-{name}", daemon=True)
+        self._threads[name] = thread
+        thread.start()
+
+    def wait(self, timeout=None):
+        # Wait for all background tasks; False if any is still running
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        for thread in list(self._threads.values()):
+            thread.join(None if deadline is None else max(0.0, deadline - time.perf_counter()))
+        return all(not thread.is_alive() for thread in self._threads.values())
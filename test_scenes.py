@@ -0,0 +1,47 @@
+# Checks of the games' screens, run headless with a synthetic camera:
+#
+#   python -m pytest test_scenes.py
+import importlib
+import os
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SNAKE_CAMERA_SOURCE', 'synthetic:noise')
+
+import pygame
+import pytest
+
+from scenes import SceneStack
+
+
+@pytest.fixture(params=['snake_game', 'snake_game2'])
+def game(request):
+    game = importlib.import_module(request.param)
+    game.start().wait(10.0)
+    yield game
+    game.camera.release()
+
+
+def test_game_over_screen_shown_without_input(game, timeout=0.5):
+    # The game over screen only redraws after input, but it must be shown
+    # as soon as it comes up. A timer event ends the wait for input in case
+    # the screen does wait before drawing.
+    scale_and_center = game.scale_and_center
+    presented = []
+
+    def timed_scale_and_center(*args, **kwargs):
+        presented.append(time.perf_counter())
+        scale_and_center(*args, **kwargs)
+
+    game.scale_and_center = timed_scale_and_center
+    pygame.event.clear()  # No input at all, not even window events left from startup
+    pygame.time.set_timer(pygame.USEREVENT, int(timeout * 1000), loops=1)
+    start = time.perf_counter()
+    try:
+        stack = SceneStack()
+        stack.push(game.GameOverScene(pygame.Surface((game.GAME_WIDTH, game.GAME_HEIGHT)), None))
+        stack.frame()
+    finally:
+        game.scale_and_center = scale_and_center
+        pygame.time.set_timer(pygame.USEREVENT, 0)
+    assert presented and presented[0] - start < timeout, "the game over screen was not shown until input arrived"